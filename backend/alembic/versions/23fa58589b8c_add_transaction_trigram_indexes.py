@@ -0,0 +1,29 @@
+"""add transaction trigram indexes
+
+Revision ID: 23fa58589b8c
+Revises: b344c9a9e051
+Create Date: 2026-10-19 09:12:41.508311
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '23fa58589b8c'
+down_revision: Union[str, None] = 'b344c9a9e051'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index('ix_transactions_description_trgm', 'transactions', ['description'], unique=False, postgresql_using='gin', postgresql_ops={'description': 'gin_trgm_ops'})
+    op.create_index('ix_transactions_merchant_name_trgm', 'transactions', ['merchant_name'], unique=False, postgresql_using='gin', postgresql_ops={'merchant_name': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    op.drop_index('ix_transactions_merchant_name_trgm', table_name='transactions', postgresql_using='gin')
+    op.drop_index('ix_transactions_description_trgm', table_name='transactions', postgresql_using='gin')
@@ -0,0 +1,29 @@
+"""add transaction search vector
+
+Revision ID: 5d81b0c4a7e2
+Revises: 9c7f3ea3e1cd
+Create Date: 2026-10-19 13:27:05.913842
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d81b0c4a7e2'
+down_revision: Union[str, None] = '9c7f3ea3e1cd'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('transactions', sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed("to_tsvector('simple', coalesce(description, '') || ' ' || coalesce(merchant_name, ''))", persisted=True), nullable=True))
+    op.create_index('ix_transactions_search_vector', 'transactions', ['search_vector'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_transactions_search_vector', table_name='transactions', postgresql_using='gin')
+    op.drop_column('transactions', 'search_vector')
@@ -0,0 +1,69 @@
+"""add unique plan per month
+
+Revision ID: 7a3e5f2d9b14
+Revises: e4b27c9f10d6
+Create Date: 2026-10-19 15:41:26.208517
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a3e5f2d9b14'
+down_revision: Union[str, None] = 'e4b27c9f10d6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Duplicate plans of a (user, year, month) and the oldest plan they are merged into
+DUPLICATES = """
+    WITH duplicates AS (
+        SELECT id, keep_id FROM (
+            SELECT id, min(id) OVER (PARTITION BY user_id, year, month) AS keep_id FROM plans
+        ) ranked
+        WHERE id <> keep_id
+    )
+"""
+
+
+def upgrade() -> None:
+    # Move limits and income of duplicate plans to the kept plan where it has none
+    # for that category / user (the newest duplicate wins), then drop the rest
+    op.execute(DUPLICATES + """
+        , moved AS (
+            SELECT DISTINCT ON (d.keep_id, cl.category_id) cl.id, d.keep_id
+            FROM category_limits cl JOIN duplicates d ON cl.plan_id = d.id
+            WHERE NOT EXISTS (
+                SELECT 1 FROM category_limits k WHERE k.plan_id = d.keep_id AND k.category_id = cl.category_id
+            )
+            ORDER BY d.keep_id, cl.category_id, cl.plan_id DESC
+        )
+        UPDATE category_limits SET plan_id = moved.keep_id FROM moved WHERE category_limits.id = moved.id
+    """)
+    op.execute(DUPLICATES + """
+        DELETE FROM category_limits USING duplicates WHERE category_limits.plan_id = duplicates.id
+    """)
+    op.execute(DUPLICATES + """
+        , moved AS (
+            SELECT DISTINCT ON (d.keep_id, pi.user_id) pi.id, d.keep_id
+            FROM plan_incomes pi JOIN duplicates d ON pi.plan_id = d.id
+            WHERE NOT EXISTS (
+                SELECT 1 FROM plan_incomes k WHERE k.plan_id = d.keep_id AND k.user_id = pi.user_id
+            )
+            ORDER BY d.keep_id, pi.user_id, pi.plan_id DESC
+        )
+        UPDATE plan_incomes SET plan_id = moved.keep_id FROM moved WHERE plan_incomes.id = moved.id
+    """)
+    op.execute(DUPLICATES + """
+        DELETE FROM plan_incomes USING duplicates WHERE plan_incomes.plan_id = duplicates.id
+    """)
+    op.execute(DUPLICATES + """
+        DELETE FROM plans USING duplicates WHERE plans.id = duplicates.id
+    """)
+    op.create_unique_constraint('_plan_user_year_month_uc', 'plans', ['user_id', 'year', 'month'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('_plan_user_year_month_uc', 'plans', type_='unique')
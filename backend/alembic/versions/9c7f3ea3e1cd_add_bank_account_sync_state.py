@@ -0,0 +1,40 @@
+"""add bank account sync state
+
+Revision ID: 9c7f3ea3e1cd
+Revises: 23fa58589b8c
+Create Date: 2026-10-19 11:02:17.164093
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c7f3ea3e1cd'
+down_revision: Union[str, None] = '23fa58589b8c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('bank_account_sync_state',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('bank_connection_id', sa.Integer(), nullable=False),
+    sa.Column('account_id', sa.String(), nullable=False),
+    sa.Column('last_synced_at', sa.DateTime(), nullable=True),
+    sa.Column('last_transaction_date', sa.Date(), nullable=True),
+    sa.Column('last_transaction_id', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['bank_connection_id'], ['bank_connections.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('bank_connection_id', 'account_id', name='_connection_account_sync_uc')
+    )
+    op.create_index(op.f('ix_bank_account_sync_state_id'), 'bank_account_sync_state', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_bank_account_sync_state_id'), table_name='bank_account_sync_state')
+    op.drop_table('bank_account_sync_state')
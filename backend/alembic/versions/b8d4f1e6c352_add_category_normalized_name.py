@@ -0,0 +1,73 @@
+"""add category normalized name
+
+Revision ID: b8d4f1e6c352
+Revises: 7a3e5f2d9b14
+Create Date: 2026-10-19 17:12:09.645218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8d4f1e6c352'
+down_revision: Union[str, None] = '7a3e5f2d9b14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Categories whose normalized names collide and the oldest category they are merged into
+DUPLICATES = """
+    WITH duplicates AS (
+        SELECT id, keep_id FROM (
+            SELECT id, min(id) OVER (PARTITION BY user_id, normalized_name) AS keep_id FROM categories
+        ) ranked
+        WHERE id <> keep_id
+    )
+"""
+
+
+def upgrade() -> None:
+    # A stored generated column is computed for all existing rows when it is added
+    op.add_column('categories', sa.Column('normalized_name', sa.String(), sa.Computed("lower(replace(name, ' ', ''))", persisted=True), nullable=True))
+
+    # Merge categories that only differed in case or spaces (e.g. "Food" / "food")
+    op.execute(DUPLICATES + """
+        UPDATE transactions SET category_id = duplicates.keep_id
+        FROM duplicates WHERE transactions.category_id = duplicates.id
+    """)
+    op.execute(DUPLICATES + """
+        UPDATE categorization_rules SET category_id = duplicates.keep_id
+        FROM duplicates WHERE categorization_rules.category_id = duplicates.id
+    """)
+    op.execute(DUPLICATES + """
+        INSERT INTO category_limits (category_id, user_id, plan_id, "limit")
+        SELECT d.keep_id, cl.user_id, cl.plan_id, sum(cl."limit")
+        FROM category_limits cl JOIN duplicates d ON cl.category_id = d.id
+        GROUP BY d.keep_id, cl.user_id, cl.plan_id
+        ON CONFLICT ON CONSTRAINT _category_plan_uc
+        DO UPDATE SET "limit" = category_limits."limit" + EXCLUDED."limit"
+    """)
+    op.execute(DUPLICATES + """
+        DELETE FROM category_limits USING duplicates WHERE category_limits.category_id = duplicates.id
+    """)
+    op.execute(DUPLICATES + """
+        INSERT INTO category_main_category (category_id, main_category_id)
+        SELECT DISTINCT d.keep_id, cmc.main_category_id
+        FROM category_main_category cmc JOIN duplicates d ON cmc.category_id = d.id
+        ON CONFLICT DO NOTHING
+    """)
+    op.execute(DUPLICATES + """
+        DELETE FROM category_main_category USING duplicates WHERE category_main_category.category_id = duplicates.id
+    """)
+    op.execute(DUPLICATES + """
+        DELETE FROM categories USING duplicates WHERE categories.id = duplicates.id
+    """)
+
+    op.create_unique_constraint('_category_user_normalized_name_uc', 'categories', ['user_id', 'normalized_name'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('_category_user_normalized_name_uc', 'categories', type_='unique')
+    op.drop_column('categories', 'normalized_name')
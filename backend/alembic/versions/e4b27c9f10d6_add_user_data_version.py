@@ -0,0 +1,94 @@
+"""add user data version
+
+Revision ID: e4b27c9f10d6
+Revises: 5d81b0c4a7e2
+Create Date: 2026-10-19 14:08:52.371904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4b27c9f10d6'
+down_revision: Union[str, None] = '5d81b0c4a7e2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Tables whose rows carry a user_id; any write to them bumps that user's version
+VERSIONED_TABLES = ['transactions', 'categories', 'main_categories', 'plans', 'category_limits', 'plan_incomes']
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('data_version', sa.BigInteger(), server_default='0', nullable=False))
+
+    # Statement-level triggers with transition tables: one UPDATE of users per
+    # statement, however many rows it touched (bulk inserts, COPY, set-based updates)
+    op.execute("""
+        CREATE FUNCTION bump_user_data_version() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                UPDATE users SET data_version = data_version + 1
+                WHERE id IN (SELECT user_id FROM new_rows);
+            ELSIF TG_OP = 'DELETE' THEN
+                UPDATE users SET data_version = data_version + 1
+                WHERE id IN (SELECT user_id FROM old_rows);
+            ELSE
+                UPDATE users SET data_version = data_version + 1
+                WHERE id IN (SELECT user_id FROM new_rows UNION SELECT user_id FROM old_rows);
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    # category_main_category has no user_id; resolve it through the category
+    op.execute("""
+        CREATE FUNCTION bump_category_user_data_version() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                UPDATE users SET data_version = data_version + 1
+                WHERE id IN (SELECT c.user_id FROM categories c JOIN new_rows r ON r.category_id = c.id);
+            ELSIF TG_OP = 'DELETE' THEN
+                UPDATE users SET data_version = data_version + 1
+                WHERE id IN (SELECT c.user_id FROM categories c JOIN old_rows r ON r.category_id = c.id);
+            ELSE
+                UPDATE users SET data_version = data_version + 1
+                WHERE id IN (
+                    SELECT c.user_id FROM categories c
+                    JOIN (SELECT category_id FROM new_rows UNION SELECT category_id FROM old_rows) r
+                    ON r.category_id = c.id
+                );
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+
+    for table, function in [(table, 'bump_user_data_version') for table in VERSIONED_TABLES] + [('category_main_category', 'bump_category_user_data_version')]:
+        # Transition tables allow only one event per trigger
+        op.execute(f"""
+            CREATE TRIGGER {table}_data_version_insert AFTER INSERT ON {table}
+            REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION {function}()
+        """)
+        op.execute(f"""
+            CREATE TRIGGER {table}_data_version_update AFTER UPDATE ON {table}
+            REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION {function}()
+        """)
+        op.execute(f"""
+            CREATE TRIGGER {table}_data_version_delete AFTER DELETE ON {table}
+            REFERENCING OLD TABLE AS old_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION {function}()
+        """)
+
+
+def downgrade() -> None:
+    for table in VERSIONED_TABLES + ['category_main_category']:
+        for event in ('insert', 'update', 'delete'):
+            op.execute(f'DROP TRIGGER IF EXISTS {table}_data_version_{event} ON {table}')
+    op.execute('DROP FUNCTION IF EXISTS bump_category_user_data_version()')
+    op.execute('DROP FUNCTION IF EXISTS bump_user_data_version()')
+    op.drop_column('users', 'data_version')
@@ -0,0 +1,35 @@
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+from pydantic import field_validator
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+# The .env file lives in the backend directory
+ENV_FILE = Path(__file__).resolve().parent.parent / ".env"
+
+
+class TrueLayerSettings(BaseSettings):
+    """TrueLayer configuration, read from TRUELAYER_* environment variables (or .env)"""
+
+    model_config = SettingsConfigDict(env_prefix="TRUELAYER_", env_file=ENV_FILE, extra="ignore")
+
+    client_id: Optional[str] = None
+    client_secret: Optional[str] = None
+    redirect_uri: str = "https://console.truelayer.com/redirect-page"
+    # Production endpoints; can point at a local fake server (see scripts/fake_truelayer.py)
+    api_url: str = "https://api.truelayer.com"
+    auth_url: str = "https://auth.truelayer.com"
+    # How far back the first sync of an account goes
+    initial_history_days: int = 5 * 365
+
+    @field_validator("redirect_uri", mode="before")
+    @classmethod
+    def default_empty_redirect_uri(cls, v):
+        # docker-compose passes unset variables through as empty strings
+        return v or cls.model_fields["redirect_uri"].default
+
+
+@lru_cache
+def get_truelayer_settings() -> TrueLayerSettings:
+    return TrueLayerSettings()
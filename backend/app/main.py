@@ -1,14 +1,32 @@
+import asyncio
 import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from backend.app.routes import auth, transactions, plans, bank_integration, main_categories
 from backend.app.database.database import engine
 from backend.app.models import user, transaction
+from backend.app.services.bank_sync_scheduler import BankSyncScheduler
+from backend.app.services.truelayer_service import get_truelayer_service
 from fastapi.middleware.cors import CORSMiddleware
 import dotenv
 # user.Base.metadata.create_all(bind=engine)
 # transaction.Base.metadata.create_all(bind=engine)
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Optional in-process bank auto-sync; prefer the separate worker in production
+    scheduler = None
+    if os.getenv("BANK_AUTO_SYNC", "false").lower() == "true":
+        scheduler = BankSyncScheduler(get_truelayer_service())
+        task = asyncio.create_task(scheduler.run_forever())
+    yield
+    if scheduler:
+        scheduler.stop()
+        task.cancel()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(router=auth.router, prefix="/api/auth", tags=["auth"])
 app.include_router(router=transactions.router, prefix="/api/transactions", tags=["transactions"])
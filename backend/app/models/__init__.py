@@ -1,5 +1,5 @@
 from .user import User
-from .transaction import Transaction, Category, BankConnection, Plan, CategoryLimit
+from .transaction import Transaction, Category, BankConnection, BankAccountSyncState, Plan, CategoryLimit
 from .categorization_rule import CategorizationRule
 
 __all__ = [
@@ -7,6 +7,7 @@ __all__ = [
     "Transaction",
     "Category",
     "BankConnection",
+    "BankAccountSyncState",
     "Plan",
     "CategoryLimit",
     "CategorizationRule",
@@ -1,5 +1,6 @@
 from ..database.database import Base
-from sqlalchemy import Column, Date, ForeignKey, Integer, String, UniqueConstraint, DateTime, Index, Table, CheckConstraint, Boolean
+from sqlalchemy import Column, Computed, Date, ForeignKey, Integer, String, UniqueConstraint, DateTime, Index, Table, CheckConstraint, Boolean
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.types import DECIMAL
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -19,6 +20,25 @@ class BankConnection(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
+class BankAccountSyncState(Base):
+    __tablename__ = "bank_account_sync_state"
+
+    id = Column(Integer, primary_key=True, index=True)
+    bank_connection_id = Column(Integer, ForeignKey("bank_connections.id"), nullable=False)
+    account_id = Column(String, nullable=False)  # TrueLayer account id
+    last_synced_at = Column(DateTime, nullable=True)
+    last_transaction_date = Column(Date, nullable=True)  # Watermark: newest transaction date seen
+    last_transaction_id = Column(String, nullable=True)  # Bank id of the newest transaction seen
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    bank_connection = relationship("BankConnection")
+
+    __table_args__ = (
+        UniqueConstraint('bank_connection_id', 'account_id', name='_connection_account_sync_uc'),
+    )
+
+
 # Association table for many-to-many relationship between Category and MainCategory
 category_main_category = Table(
     "category_main_category",
@@ -46,11 +66,29 @@ class Transaction(Base):
     transaction_type = Column(String, nullable=True)
     bank_connection_id = Column(Integer, ForeignKey("bank_connections.id"), nullable=True)
 
+    # Full-text search document, kept up to date by PostgreSQL
+    search_vector = Column(
+        TSVECTOR,
+        Computed(
+            "to_tsvector('simple', coalesce(description, '') || ' ' || coalesce(merchant_name, ''))",
+            persisted=True,
+        ),
+    )
+
     # Relationships
     user = relationship("User")
     bank_connection = relationship("BankConnection")
     category = relationship("Category", back_populates="transactions")
 
+    __table_args__ = (
+        # Trigram indexes for substring (LIKE '%...%') matching, e.g. filter rule previews
+        Index('ix_transactions_description_trgm', 'description',
+              postgresql_using='gin', postgresql_ops={'description': 'gin_trgm_ops'}),
+        Index('ix_transactions_merchant_name_trgm', 'merchant_name',
+              postgresql_using='gin', postgresql_ops={'merchant_name': 'gin_trgm_ops'}),
+        Index('ix_transactions_search_vector', 'search_vector', postgresql_using='gin'),
+    )
+
 
 class MainCategory(Base):
     __tablename__ = "main_categories"
@@ -74,6 +112,8 @@ class Category(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    # Lookup key: lowercase name without spaces; see CategoryService.normalize_name
+    normalized_name = Column(String, Computed("lower(replace(name, ' ', ''))", persisted=True))
 
     # Relationships
     user = relationship("User")
@@ -84,6 +124,7 @@ class Category(Base):
 
     __table_args__ = (
         UniqueConstraint('name', 'user_id', name='_category_name_user_uc'),
+        UniqueConstraint('user_id', 'normalized_name', name='_category_user_normalized_name_uc'),
     )
 
 
@@ -99,6 +140,10 @@ class Plan(Base):
     category_limits = relationship('CategoryLimit', back_populates='plan')
     incomes = relationship('PlanIncome', back_populates='plan')
 
+    __table_args__ = (
+        UniqueConstraint('user_id', 'year', 'month', name='_plan_user_year_month_uc'),
+    )
+
 
 class CategoryLimit(Base):
     __tablename__ = 'category_limits'
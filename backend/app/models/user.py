@@ -1,5 +1,5 @@
 from ..database.database import Base
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import BigInteger, Column, Integer, String
 from sqlalchemy.orm import relationship
 
 
@@ -9,6 +9,8 @@ class User(Base):
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String, unique=True, index=True)
     hashed_password = Column(String)
+    # Bumped by database triggers on every write to the user's budget data; used for ETags
+    data_version = Column(BigInteger, nullable=False, default=0, server_default='0')
     plans = relationship('Plan', back_populates='user')
     category_limits = relationship('CategoryLimit', back_populates='user')
     bank_connections = relationship('BankConnection', backref='user')
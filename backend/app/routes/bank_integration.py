@@ -9,18 +9,18 @@ from backend.app.database.database import get_db
 from backend.app.models.user import User
 from backend.app.models.transaction import BankConnection, Transaction
 from backend.app.routes.auth import get_current_user
-from backend.app.services.truelayer_service import TrueLayerService
-from backend.app.services.categorization_service import CategorizationService
+from backend.app.services.truelayer_service import TrueLayerService, get_truelayer_service
+from backend.app.services.bank_sync_engine import BankSyncEngine
 from backend.app.services.filter_service import TransactionFilterService
 from backend.app.schemas.schemas import (
     TransactionFilterRuleCreate, 
     TransactionFilterRuleUpdate, 
-    TransactionFilterRuleResponse
+    TransactionFilterRuleResponse,
+    TransactionFilterRulePreviewResponse,
 )
 from pydantic import BaseModel
 
 router = APIRouter()
-truelayer_service = TrueLayerService()
 
 
 class BankConnectionResponse(BaseModel):
@@ -33,7 +33,10 @@ class BankConnectionResponse(BaseModel):
 
 
 @router.get("/auth-link")
-async def get_auth_link(current_user: User = Depends(get_current_user)):
+async def get_auth_link(
+    current_user: User = Depends(get_current_user),
+    truelayer_service: TrueLayerService = Depends(get_truelayer_service),
+):
     """Generate authentication link for connecting a bank account"""
     # Encode user ID into the state parameter
     state = base64.urlsafe_b64encode(str(current_user.id).encode()).decode()
@@ -48,11 +51,9 @@ async def truelayer_callback(
     state: str = Query(...),
     # current_user: User = Depends(get_current_user), # Removed dependency
     db: Session = Depends(get_db),
+    truelayer_service: TrueLayerService = Depends(get_truelayer_service),
 ):
     """Handle callback from TrueLayer after user authorizes access"""
-    categorization_service = CategorizationService(db)
-    filter_service = TransactionFilterService(db)
-    
     try:
         # Decode user_id from state
         try:
@@ -121,55 +122,19 @@ async def truelayer_callback(
             print(f"Fetching transactions from {from_date} onwards")
 
         # Import transactions for all accounts
-        transactions_imported = 0
-        transactions_filtered = 0
-        for account_data in accounts:
-            # Fetch transactions with optional from_date
-            transactions = truelayer_service.get_account_transactions(
-                token_data["access_token"], 
-                account_data["account_id"],
-                from_date=from_date
-            )
-
-            # Import transactions
-            for tx_data in transactions:
-                # Check if transaction already exists
-                existing_tx = (
-                    db.query(Transaction)
-                    .filter(
-                        Transaction.bank_transaction_id == tx_data["transaction_id"]
-                    )
-                    .first()
-                )
-
-                if not existing_tx:
-                    tx_formatted = truelayer_service.format_transaction(
-                        tx_data, user.id, connection.id
-                    )
-
-                    # Skip income transactions (amount >= 0)
-                    if tx_formatted["amount"] >= 0:
-                        continue  # Skip this transaction
-                    
-                    # Apply filter rules to see if we should skip this transaction
-                    if filter_service.should_skip_transaction(user.id, tx_formatted):
-                        transactions_filtered += 1
-                        continue  # Skip filtered transaction
-
-                    transaction = Transaction(**tx_formatted)
-                    
-                    # Attempt automatic categorization now based on merchant_name OR description
-                    categorization_service.apply_category_to_transaction(transaction)
-                    # The transaction object might have category_id updated now
-                        
-                    db.add(transaction)
-                    transactions_imported += 1
+        sync_engine = BankSyncEngine(db, truelayer_service)
+        sync_result = await sync_engine.sync(
+            connection,
+            [account_data["account_id"] for account_data in accounts],
+            from_date=from_date,
+            commit_progress=True
+        )
 
         db.commit()
         return {
             "message": "Bank account connected successfully",
-            "transactions_imported": transactions_imported,
-            "transactions_filtered": transactions_filtered,
+            "transactions_imported": sync_result["transactions_imported"],
+            "transactions_filtered": sync_result["transactions_filtered"],
         }
 
     except Exception as e:
@@ -195,6 +160,7 @@ async def refresh_transactions(
     connection_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
+    truelayer_service: TrueLayerService = Depends(get_truelayer_service),
 ):
     """Refresh transactions for a specific bank connection"""
     connection = (
@@ -209,101 +175,42 @@ async def refresh_transactions(
     if not connection:
         raise HTTPException(status_code=404, detail="Connection not found")
 
-    categorization_service = CategorizationService(db)
-    filter_service = TransactionFilterService(db)
+    sync_engine = BankSyncEngine(db, truelayer_service)
 
-    # Get the most recent transaction for this connection to use as start date
-    most_recent_transaction = (
-        db.query(Transaction)
-        .filter(
-            Transaction.bank_connection_id == connection.id,
-            Transaction.bank_transaction_id.isnot(None)  # Make sure it's a bank transaction
-        )
-        .order_by(Transaction.operation_date.desc())
-        .first()
-    )
-    
-    # Set from_date to one day after the most recent transaction we have
-    # or None if we don't have any transactions yet
-    from_date = None
-    if most_recent_transaction and most_recent_transaction.operation_date:
-        # Add one day to avoid duplicates (but still catch same-day transactions that came in later)
-        from_date = most_recent_transaction.operation_date.isoformat()
+    # Accounts synced before keep their own cursor (see BankSyncEngine). For accounts
+    # without one, start from the most recent transaction stored for this connection
+    from_date = sync_engine.latest_transaction_date(connection)
+    if from_date:
         print(f"Fetching transactions from {from_date} onwards")
 
     # Check if token is expired
-    if connection.token_expires_at <= datetime.utcnow():
-        # Refresh token
-        try:
-            token_data = truelayer_service.refresh_access_token(
-                connection.refresh_token
-            )
-            connection.access_token = token_data["access_token"]
-            connection.refresh_token = token_data["refresh_token"]
-            connection.token_expires_at = datetime.utcnow() + timedelta(
-                seconds=token_data["expires_in"]
-            )
-            db.commit()
-        except Exception as error:
-            print(f"Token refresh error: {str(error)}")
-            raise HTTPException(
-                status_code=401, detail="Failed to refresh token, reconnection required"
-            )
+    try:
+        sync_engine.refresh_token_if_expiring(connection)
+        db.commit()  # Also releases the connection row lock taken for the refresh
+    except Exception as error:
+        db.rollback()
+        print(f"Token refresh error: {str(error)}")
+        raise HTTPException(
+            status_code=401, detail="Failed to refresh token, reconnection required"
+        )
 
     try:
         # Get accounts
         accounts = truelayer_service.get_accounts(connection.access_token)
 
         # Import transactions for all accounts
-        transactions_imported = 0
-        transactions_filtered = 0
-        for account_data in accounts:
-            # Fetch transactions with optional from_date
-            transactions = truelayer_service.get_account_transactions(
-                connection.access_token, 
-                account_data["account_id"],
-                from_date=from_date  # Pass the from_date parameter
-            )
-
-            # Import transactions
-            for tx_data in transactions:
-                # Check if transaction already exists
-                existing_tx = (
-                    db.query(Transaction)
-                    .filter(
-                        Transaction.bank_transaction_id == tx_data["transaction_id"]
-                    )
-                    .first()
-                )
-
-                if not existing_tx:
-                    tx_formatted = truelayer_service.format_transaction(
-                        tx_data, current_user.id, connection.id
-                    )
-
-                    # Skip income transactions (amount >= 0)
-                    if tx_formatted["amount"] >= 0:
-                        continue  # Skip this transaction
-                    
-                    # Apply filter rules to see if we should skip this transaction
-                    if filter_service.should_skip_transaction(current_user.id, tx_formatted):
-                        transactions_filtered += 1
-                        continue  # Skip filtered transaction
-
-                    transaction = Transaction(**tx_formatted)
-                    
-                    # Attempt automatic categorization now based on merchant_name OR description
-                    categorization_service.apply_category_to_transaction(transaction)
-                    # The transaction object might have category_id updated now
-                        
-                    db.add(transaction)
-                    transactions_imported += 1
+        sync_result = await sync_engine.sync(
+            connection,
+            [account_data["account_id"] for account_data in accounts],
+            from_date=from_date,
+            commit_progress=True
+        )
 
         db.commit()
         return {
             "message": "Transactions refreshed successfully",
-            "transactions_imported": transactions_imported,
-            "transactions_filtered": transactions_filtered,
+            "transactions_imported": sync_result["transactions_imported"],
+            "transactions_filtered": sync_result["transactions_filtered"],
         }
 
     except Exception as e:
@@ -346,6 +253,29 @@ async def create_filter_rule(
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@router.post("/filter-rules/preview", response_model=TransactionFilterRulePreviewResponse)
+async def preview_filter_rule(
+    rule_data: TransactionFilterRuleCreate,
+    sample_size: int = Query(10, ge=0, le=100),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Show how many stored transactions a candidate filter rule would exclude, without saving it"""
+    filter_service = TransactionFilterService(db)
+
+    try:
+        return filter_service.preview_filter_rule(
+            user_id=current_user.id,
+            description_pattern=rule_data.description_pattern,
+            merchant_name=rule_data.merchant_name,
+            min_amount=rule_data.min_amount,
+            max_amount=rule_data.max_amount,
+            sample_size=sample_size
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.put("/filter-rules/{rule_id}", response_model=TransactionFilterRuleResponse)
 async def update_filter_rule(
     rule_id: int,
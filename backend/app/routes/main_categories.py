@@ -1,19 +1,28 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session, selectinload
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import func
+from sqlalchemy import func, select, tuple_, delete
+from sqlalchemy.dialects.postgresql import insert
 
 from backend.app.database.database import get_db
-from backend.app.models.transaction import MainCategory, Category
+from backend.app.models.transaction import (
+    MainCategory, Category, CategoryLimit, Plan, Transaction, category_main_category
+)
 from backend.app.models.user import User
 from backend.app.schemas.schemas import (
     MainCategoryCreate,
     MainCategoryResponse,
     MainCategoryDetailResponse,
+    MainCategorySpendingSummary,
+    MainCategoryCategoriesUpdate,
+    CategoryMainCategoryBulkUpdate,
+    CategoryMainCategoryBulkResult,
     CategoryResponse
 )
 from backend.app.utils.auth import get_current_user
+from backend.app.utils.etag import data_version_etag
 
 router = APIRouter()
 
@@ -71,7 +80,7 @@ def create_main_category(
         )
 
 
-@router.get("", response_model=dict)
+@router.get("", response_model=dict, dependencies=[Depends(data_version_etag)])
 def get_main_categories(
     db: Session = Depends(get_db), 
     current_user: User = Depends(get_current_user),
@@ -97,7 +106,123 @@ def get_main_categories(
     return {"main_categories": main_categories}
 
 
-@router.get("/{main_category_id}", response_model=MainCategoryDetailResponse)
+@router.get("/summary", response_model=MainCategorySpendingSummary, dependencies=[Depends(data_version_etag)])
+def get_main_category_summary(
+    year: int = Query(..., ge=1900, le=2100),
+    month: Optional[int] = Query(None, ge=1, le=12, description="Summarize the whole year if omitted"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Spending and limits per main category and per child category, for a month or a year.
+
+    Computed by one grouped query (GROUPING SETS) over the category / main category
+    association: one row per (main category, category) plus one subtotal row per
+    main category. Only categories with spending or a limit in the period are listed.
+
+    A category linked to several main categories counts fully towards each of them
+    (its `main_category_count` is > 1), so main category totals can add up to more
+    than `total_spent`, which counts every category once. Categories without a main
+    category are grouped under `main_category_id: null`. Spending on transactions
+    without a category is reported as `uncategorized_spent` and included in
+    `total_spent`.
+    """
+    if month:
+        period_start = date(year, month, 1)
+        period_end = date(year + month // 12, month % 12 + 1, 1)
+    else:
+        period_start, period_end = date(year, 1, 1), date(year + 1, 1, 1)
+
+    spent = (
+        select(Transaction.category_id, (-func.sum(Transaction.amount)).label("spent"))
+        .where(
+            Transaction.user_id == current_user.id,
+            Transaction.amount < 0,
+            Transaction.operation_date >= period_start,
+            Transaction.operation_date < period_end,
+        )
+        .group_by(Transaction.category_id)
+        .subquery("spent")
+    )
+    plan_months = [(year, month)] if month else [(year, m) for m in range(1, 13)]
+    limits = (
+        select(CategoryLimit.category_id, func.sum(CategoryLimit.limit).label("limit"))
+        .join(Plan, CategoryLimit.plan_id == Plan.id)
+        .where(
+            CategoryLimit.user_id == current_user.id,
+            tuple_(Plan.year, Plan.month).in_(plan_months),
+        )
+        .group_by(CategoryLimit.category_id)
+        .subquery("limits")
+    )
+
+    rows = db.execute(
+        select(
+            MainCategory.id.label("main_category_id"),
+            MainCategory.name.label("main_category_name"),
+            Category.id.label("category_id"),
+            Category.name.label("category_name"),
+            func.coalesce(func.sum(spent.c.spent), 0).label("spent"),
+            func.coalesce(func.sum(limits.c.limit), 0).label("limit"),
+            func.grouping(Category.id).label("is_subtotal"),
+        )
+        .select_from(Category)
+        .outerjoin(category_main_category, category_main_category.c.category_id == Category.id)
+        .outerjoin(MainCategory, MainCategory.id == category_main_category.c.main_category_id)
+        .outerjoin(spent, spent.c.category_id == Category.id)
+        .outerjoin(limits, limits.c.category_id == Category.id)
+        .where(
+            Category.user_id == current_user.id,
+            (spent.c.spent.isnot(None)) | (limits.c.limit.isnot(None)),
+        )
+        .group_by(func.grouping_sets(
+            tuple_(MainCategory.id, MainCategory.name, Category.id, Category.name),
+            tuple_(MainCategory.id, MainCategory.name),
+        ))
+        .order_by(MainCategory.name.nulls_last(), MainCategory.id, Category.name)
+    ).all()
+    uncategorized_spent = db.scalar(
+        select(func.coalesce(func.sum(spent.c.spent), 0)).where(spent.c.category_id.is_(None))
+    )
+
+    main_categories: Dict[Optional[int], dict] = {}
+    category_totals: Dict[int, tuple] = {}
+    main_category_counts: Dict[int, int] = {}
+    for row in rows:
+        if row.is_subtotal:
+            main_categories[row.main_category_id] = {
+                "main_category_id": row.main_category_id,
+                "main_category_name": row.main_category_name,
+                "spent": row.spent,
+                "limit": row.limit,
+                "categories": [],
+            }
+        else:
+            category_totals[row.category_id] = (row.spent, row.limit)
+            if row.main_category_id is not None:
+                main_category_counts[row.category_id] = main_category_counts.get(row.category_id, 0) + 1
+
+    for row in rows:
+        if not row.is_subtotal:
+            main_categories[row.main_category_id]["categories"].append({
+                "category_id": row.category_id,
+                "category_name": row.category_name,
+                "spent": row.spent,
+                "limit": row.limit,
+                "main_category_count": main_category_counts.get(row.category_id, 0),
+            })
+
+    return {
+        "year": year,
+        "month": month,
+        "total_spent": uncategorized_spent + sum(spent_amount for spent_amount, _ in category_totals.values()),
+        "uncategorized_spent": uncategorized_spent,
+        "total_limit": sum(limit for _, limit in category_totals.values()),
+        "main_categories": list(main_categories.values()),
+    }
+
+
+@router.get("/{main_category_id}", response_model=MainCategoryDetailResponse, dependencies=[Depends(data_version_etag)])
 def get_main_category(
     main_category_id: int,
     db: Session = Depends(get_db),
@@ -112,6 +237,8 @@ def get_main_category(
             MainCategory.id == main_category_id,
             MainCategory.user_id == current_user.id
         )
+        # Categories and their main category links in two queries, however many there are
+        .options(selectinload(MainCategory.categories).selectinload(Category.main_categories))
         .first()
     )
     
@@ -230,7 +357,7 @@ def delete_main_category(
     return None
 
 
-@router.get("/{main_category_id}/categories", response_model=dict)
+@router.get("/{main_category_id}/categories", response_model=dict, dependencies=[Depends(data_version_etag)])
 def get_categories_by_main_category(
     main_category_id: int,
     db: Session = Depends(get_db),
@@ -245,6 +372,8 @@ def get_categories_by_main_category(
             MainCategory.id == main_category_id,
             MainCategory.user_id == current_user.id
         )
+        # Categories and their main category links in two queries, however many there are
+        .options(selectinload(MainCategory.categories).selectinload(Category.main_categories))
         .first()
     )
     
@@ -327,10 +456,10 @@ def remove_category_from_main_category(
         )
         .first()
     )
-    
+
     if not main_category:
         raise HTTPException(status_code=404, detail="Main category not found")
-    
+
     category = (
         db.query(Category)
         .filter(
@@ -339,16 +468,131 @@ def remove_category_from_main_category(
         )
         .first()
     )
-    
+
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
-    
+
     # Check if the association exists
     if main_category not in category.main_categories:
         return None
-    
+
     # Remove the association
     category.main_categories.remove(main_category)
     db.commit()
-    
-    return None 
\ No newline at end of file
+
+    return None
+
+
+def _check_ownership(
+    db: Session, user_id: int, main_category_ids: Iterable[int], category_ids: Iterable[int]
+) -> None:
+    """Raise 404 unless all given main categories and categories belong to the user"""
+    main_category_ids, category_ids = set(main_category_ids), set(category_ids)
+    if main_category_ids:
+        owned = set(db.scalars(
+            select(MainCategory.id).where(MainCategory.id.in_(main_category_ids), MainCategory.user_id == user_id)
+        ))
+        if owned != main_category_ids:
+            raise HTTPException(
+                status_code=404, detail=f"Main categories not found: {sorted(main_category_ids - owned)}"
+            )
+    if category_ids:
+        owned = set(db.scalars(
+            select(Category.id).where(Category.id.in_(category_ids), Category.user_id == user_id)
+        ))
+        if owned != category_ids:
+            raise HTTPException(status_code=404, detail=f"Categories not found: {sorted(category_ids - owned)}")
+
+
+def _apply_association_changes(db: Session, to_add: Set[Tuple[int, int]], to_remove: Set[Tuple[int, int]]) -> int:
+    """
+    Insert and delete (main_category_id, category_id) links with one statement each.
+    Returns the number of links actually inserted. Does NOT commit.
+    """
+    added = 0
+    if to_remove:
+        db.execute(
+            delete(category_main_category).where(
+                tuple_(category_main_category.c.main_category_id, category_main_category.c.category_id).in_(to_remove)
+            )
+        )
+    if to_add:
+        result = db.execute(
+            insert(category_main_category)
+            .values([
+                {"main_category_id": main_category_id, "category_id": category_id}
+                for main_category_id, category_id in to_add
+            ])
+            .on_conflict_do_nothing()
+            .returning(category_main_category.c.category_id)
+        )
+        added = len(result.all())
+    return added
+
+
+@router.put("/{main_category_id}/categories", response_model=CategoryMainCategoryBulkResult)
+def set_main_category_categories(
+    main_category_id: int,
+    update: MainCategoryCategoriesUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Replace the categories of a main category with the given set.
+
+    The request is diffed against the association table, and only the missing
+    links are inserted and the extra ones deleted, in one transaction.
+    """
+    category_ids = set(update.category_ids)
+    _check_ownership(db, current_user.id, [main_category_id], category_ids)
+
+    current = set(db.scalars(
+        select(category_main_category.c.category_id).where(
+            category_main_category.c.main_category_id == main_category_id
+        )
+    ))
+    to_remove = {(main_category_id, category_id) for category_id in current - category_ids}
+    added = _apply_association_changes(
+        db,
+        {(main_category_id, category_id) for category_id in category_ids - current},
+        to_remove,
+    )
+    db.commit()
+
+    return CategoryMainCategoryBulkResult(added=added, removed=len(to_remove))
+
+
+@router.post("/categories/bulk", response_model=CategoryMainCategoryBulkResult)
+def bulk_update_category_links(
+    update: CategoryMainCategoryBulkUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Add and remove many category / main category links at once.
+
+    Pairs already in the requested state are ignored; a pair listed in both `add`
+    and `remove` is removed. All changes are applied in one transaction.
+    """
+    to_add = {(pair.main_category_id, pair.category_id) for pair in update.add}
+    to_remove = {(pair.main_category_id, pair.category_id) for pair in update.remove}
+    to_add -= to_remove
+    pairs = to_add | to_remove
+    _check_ownership(
+        db,
+        current_user.id,
+        (main_category_id for main_category_id, _ in pairs),
+        (category_id for _, category_id in pairs),
+    )
+
+    existing = set()
+    if to_remove:
+        existing = set(db.execute(
+            select(category_main_category.c.main_category_id, category_main_category.c.category_id).where(
+                tuple_(category_main_category.c.main_category_id, category_main_category.c.category_id).in_(to_remove)
+            )
+        ).tuples())
+    added = _apply_association_changes(db, to_add, existing)
+    db.commit()
+
+    return CategoryMainCategoryBulkResult(added=added, removed=len(existing))
@@ -20,12 +20,18 @@ from backend.app.schemas.schemas import (
     PlanResponse,
     CategoryLimitResponse,
     CategoryLimitCreate,  # Added CategoryLimitCreate
+    CategoryLimitBulkUpsert,
+    PlanRollover,
+    PlanYearReport,
     PlanIncomeCreate,
     PlanIncomeResponse,
 )
 from backend.app.utils.auth import get_current_user
+from backend.app.services.plan_service import PlanService
+from backend.app.utils.etag import data_version_etag
 from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
-from sqlalchemy import desc, func
+from sqlalchemy import desc, func, delete
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 
@@ -38,19 +44,19 @@ async def create_plan(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    db_plan = Plan(**plan.model_dump(), user_id=current_user.id)
-    db.add(db_plan)
-    db.commit()
-    db.refresh(db_plan)
-    return PlanResponse(
+    # Returns the existing plan if the month already has one
+    db_plan = PlanService(db).get_or_create_plan(current_user.id, plan.year, plan.month)
+    response = PlanResponse(
         id=db_plan.id,
         month=db_plan.month,
         year=db_plan.year,
         user_id=db_plan.user_id,
     )
+    db.commit()
+    return response
 
 
-@router.get("/", response_model=List[PlanResponse])
+@router.get("/", response_model=List[PlanResponse], dependencies=[Depends(data_version_etag)])
 async def get_plans(
     year: int,
     db: Session = Depends(get_db),
@@ -62,6 +68,57 @@ async def get_plans(
     return [PlanResponse(id=plan.id, month=plan.month, year=plan.year, user_id=plan.user_id) for plan in plans]
 
 
+@router.get("/report", response_model=PlanYearReport, dependencies=[Depends(data_version_etag)])
+async def get_plan_report(
+    year: int = Query(..., ge=1900, le=2100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Plan-vs-actual report for a whole year: income, limits, actual spending and
+    variance for every month and category, computed in a single query.
+    """
+    return PlanService(db).yearly_report(current_user.id, year)
+
+
+@router.post("/{plan_id}/rollover", response_model=List[PlanResponse])
+async def rollover_plan(
+    plan_id: int,
+    rollover: PlanRollover,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Copy a plan's category limits and income into one or more target months.
+
+    Target plans are created as needed. Limits are `scale_factor` times the source
+    limit, or with `basis="actual"` times the source month's actual spending per
+    category. Existing target limits and income are kept unless `overwrite` is set.
+    """
+    source_plan = db.query(Plan).filter(Plan.id == plan_id, Plan.user_id == current_user.id).first()
+    if not source_plan:
+        raise HTTPException(status_code=404, detail="Plan not found")
+
+    months = [(target.year, target.month) for target in rollover.targets]
+    if (source_plan.year, source_plan.month) in months:
+        raise HTTPException(status_code=400, detail="Cannot roll a plan over into its own month")
+
+    target_plans = PlanService(db).rollover(
+        source_plan,
+        months,
+        scale_factor=rollover.scale_factor,
+        basis=rollover.basis,
+        overwrite=rollover.overwrite,
+    )
+    # Build the response before committing, which would expire the loaded plans
+    response = [
+        PlanResponse(id=plan.id, month=plan.month, year=plan.year, user_id=plan.user_id)
+        for plan in target_plans
+    ]
+    db.commit()
+    return response
+
+
 @router.put("/{plan_id}/category_limits/", response_model=CategoryLimitResponse)
 async def update_category_limit(
     plan_id: int,
@@ -101,7 +158,81 @@ async def update_category_limit(
     )
 
 
-@router.get("/{plan_id}/category_limits/", response_model=List[CategoryLimitResponse])
+@router.put("/{plan_id}/category_limits/bulk", response_model=List[CategoryLimitResponse])
+async def bulk_upsert_category_limits(
+    plan_id: int,
+    bulk: CategoryLimitBulkUpsert,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Set all category limits of a plan at once.
+
+    Limits are inserted or updated with a single INSERT ... ON CONFLICT statement
+    in one transaction. With `remove_missing`, limits for categories not in the
+    request are deleted, making the request the plan's complete limit set.
+
+    Returns the plan's resulting limits.
+    """
+    db_plan = db.query(Plan).filter(Plan.id == plan_id, Plan.user_id == current_user.id).first()
+    if not db_plan:
+        raise HTTPException(status_code=404, detail="Plan not found")
+
+    category_ids = [limit.category_id for limit in bulk.limits]
+    if category_ids:
+        owned_category_ids = {
+            row.id for row in db.query(Category.id).filter(
+                Category.id.in_(category_ids), Category.user_id == current_user.id
+            )
+        }
+        unknown_category_ids = sorted(set(category_ids) - owned_category_ids)
+        if unknown_category_ids:
+            raise HTTPException(status_code=400, detail=f"Categories not found: {unknown_category_ids}")
+
+        stmt = insert(CategoryLimit).values([
+            {
+                "category_id": limit.category_id,
+                "user_id": current_user.id,
+                "plan_id": plan_id,
+                "limit": limit.limit,
+            }
+            for limit in bulk.limits
+        ])
+        db.execute(stmt.on_conflict_do_update(
+            constraint="_category_plan_uc",
+            set_={"limit": stmt.excluded.limit},
+        ))
+
+    if bulk.remove_missing:
+        db.execute(
+            delete(CategoryLimit).where(
+                CategoryLimit.plan_id == plan_id,
+                CategoryLimit.user_id == current_user.id,
+                CategoryLimit.category_id.notin_(category_ids),
+            )
+        )
+
+    db.commit()
+
+    category_limits = (
+        db.query(CategoryLimit)
+        .filter(CategoryLimit.plan_id == plan_id, CategoryLimit.user_id == current_user.id)
+        .order_by(CategoryLimit.category_id)
+        .all()
+    )
+    return [
+        CategoryLimitResponse(
+            id=category_limit.id,
+            category_id=category_limit.category_id,
+            user_id=category_limit.user_id,
+            plan_id=category_limit.plan_id,
+            limit=category_limit.limit,
+        )
+        for category_limit in category_limits
+    ]
+
+
+@router.get("/{plan_id}/category_limits/", response_model=List[CategoryLimitResponse], dependencies=[Depends(data_version_etag)])
 async def get_category_limits(
     plan_id: int,
     db: Session = Depends(get_db),
@@ -136,46 +267,18 @@ async def create_category_limit(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    # Special case: plan_id=0 means we always want to create a new plan
-    if plan_id == 0:
-        if month is None or year is None:
-            current_date = datetime.now()
-            month = month or current_date.month
-            year = year or current_date.year
-            
-        # Create new plan
-        new_plan = Plan(
-            month=month,
-            year=year,
-            user_id=current_user.id
-        )
-        db.add(new_plan)
-        db.commit()
-        db.refresh(new_plan)
-        plan_id = new_plan.id
-    else:
-        # Check if the specified plan exists
+    # plan_id=0 or an unknown plan means: use the plan of the given month
+    # (current month by default), creating it if needed
+    db_plan = None
+    if plan_id != 0:
         db_plan = db.query(Plan).filter(Plan.id == plan_id, Plan.user_id == current_user.id).first()
-        
-        # If plan doesn't exist, create a new one
-        if not db_plan:
-            # If month and year are provided, use them; otherwise use current date
-            if month is None or year is None:
-                current_date = datetime.now()
-                month = month or current_date.month
-                year = year or current_date.year
-            
-            # Create new plan
-            new_plan = Plan(
-                month=month,
-                year=year,
-                user_id=current_user.id
-            )
-            db.add(new_plan)
-            db.commit()
-            db.refresh(new_plan)
-            plan_id = new_plan.id
-    
+    if not db_plan:
+        current_date = datetime.now()
+        db_plan = PlanService(db).get_or_create_plan(
+            current_user.id, year or current_date.year, month or current_date.month
+        )
+        plan_id = db_plan.id
+
     # Now check if the category limit already exists
     db_category_limit = (
         db.query(CategoryLimit)
@@ -196,16 +299,18 @@ async def create_category_limit(
         limit=category_limit.limit,
     )
     db.add(db_category_limit)
-    db.commit()
-    db.refresh(db_category_limit)
+    db.flush()
 
-    return CategoryLimitResponse(
+    response = CategoryLimitResponse(
         id=db_category_limit.id,
         plan_id=db_category_limit.plan_id,
         category_id=db_category_limit.category_id,
         user_id=current_user.id,
         limit=db_category_limit.limit,
     )
+    # Plan and limit are committed together
+    db.commit()
+    return response
 
 
 @router.delete("/{plan_id}/categories/{category_id}", status_code=204)
@@ -275,7 +380,7 @@ async def create_or_update_plan_income(
         return new_income
 
 
-@router.get("/{plan_id}/income", response_model=PlanIncomeResponse)
+@router.get("/{plan_id}/income", response_model=PlanIncomeResponse, dependencies=[Depends(data_version_etag)])
 async def get_plan_income(
     plan_id: int,
     db: Session = Depends(get_db),
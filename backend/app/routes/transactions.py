@@ -2,7 +2,9 @@ import csv
 import io
 from datetime import datetime, date
 from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
-from typing import Optional, List
+from typing import Optional, List, Literal
+
+import orjson
 
 from backend.app.database.database import get_db
 from backend.app.models.transaction import (
@@ -30,12 +32,22 @@ from backend.app.schemas.schemas import (
     DashboardResponse,
     CategoryEdit,
     MainCategoryResponse,
+    TransactionBulkOperation,
+    TransactionBulkResult,
+    TransactionResponseRow,
+    CategoryMerge,
+    CategoryMergeResult,
 )
 from backend.app.utils.auth import get_current_user
+from backend.app.utils.etag import cache_headers, daily_data_version_etag, data_version_etag
 from backend.app.services.categorization_service import CategorizationService
+from backend.app.services.category_service import CategoryService
+from backend.app.services.export_service import TransactionExportService
 from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
-from sqlalchemy import desc, func, extract
-from sqlalchemy.orm import Session
+from fastapi.responses import Response, StreamingResponse
+from pydantic import TypeAdapter
+from sqlalchemy import desc, func, extract, update, delete, select, literal, or_
+from sqlalchemy.orm import Session, selectinload
 from sqlalchemy.exc import IntegrityError
 
 router = APIRouter()
@@ -59,22 +71,8 @@ async def upload_transactions(
         for row in csv.DictReader(io.StringIO(text_contents), delimiter=";")
     )
 
-    # Create or get existing categories
-    categories = {}
-    for category_name in category_names:
-        existing_category = (
-            db.query(Category)
-            .filter(Category.name == category_name, Category.user_id == current_user.id)
-            .first()
-        )
-
-        if not existing_category:
-            new_category = Category(name=category_name, user_id=current_user.id)
-            db.add(new_category)
-            db.flush()  # This will assign an ID to the new category
-            categories[category_name] = new_category.id
-        else:
-            categories[category_name] = existing_category.id
+    # Create or get existing categories in one batch
+    categories = CategoryService(db).get_or_create_categories(current_user.id, category_names)
 
     # Reset the CSV reader
     csv_file = io.StringIO(text_contents)
@@ -159,7 +157,7 @@ def get_summary(
     return summary
 
 
-@router.get("/categories", response_model=dict)
+@router.get("/categories", response_model=dict, dependencies=[Depends(data_version_etag)])
 def get_transaction_categories(
     db: Session = Depends(get_db), current_user: User = Depends(get_current_user),
     only_names: bool = False
@@ -173,8 +171,11 @@ def get_transaction_categories(
         db.query(Category)
         .filter(Category.user_id == current_user.id)
         .order_by(Category.name)
-        .all()
     )
+    if not only_names:
+        # Load all main category links in one extra query instead of one per category
+        categories = categories.options(selectinload(Category.main_categories))
+    categories = categories.all()
 
     # unique_categories = [cat[0] for cat in categories if cat[0] and cat[0].strip()]
     if only_names:
@@ -205,8 +206,22 @@ async def update_category(
     if not db_category:
         raise HTTPException(status_code=404, detail="Category not found")
 
+    # Names are unique per user ignoring case and spaces; renaming onto another one would clash
+    existing_category = CategoryService(db).find_by_name(current_user.id, category_edit.name)
+    if existing_category and existing_category.id != db_category.id:
+        raise HTTPException(
+            status_code=400, detail=f"Category '{category_edit.name}' already exists"
+        )
+
     db_category.name = category_edit.name
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        # Same name created concurrently
+        db.rollback()
+        raise HTTPException(
+            status_code=400, detail=f"Category '{category_edit.name}' already exists"
+        )
     db.refresh(db_category)
     db_category.main_categories = []
     return db_category
@@ -230,14 +245,7 @@ def create_category(
         normalized_name = category_data.name.replace(' ', '').lower()
 
         # Check if category already exists for this user
-        existing_category = (
-            db.query(Category)
-            .filter(
-                func.lower(func.replace(Category.name, ' ', '')) == normalized_name,
-                Category.user_id == current_user.id,
-            )
-            .first()
-        )
+        existing_category = CategoryService(db).find_by_name(current_user.id, normalized_name)
 
         if existing_category:
             raise HTTPException(
@@ -268,6 +276,149 @@ def create_category(
         raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
 
 
+def _transaction_filters(
+    month: Optional[int],
+    year: Optional[int],
+    start_date: Optional[date],
+    end_date: Optional[date],
+    category_id: Optional[int],
+) -> list:
+    """Build the optional filter conditions shared by the transaction list and export"""
+    conditions = []
+    if month:
+        conditions.append(extract("month", Transaction.operation_date) == month)
+    if year:
+        conditions.append(extract("year", Transaction.operation_date) == year)
+    if start_date:
+        conditions.append(Transaction.operation_date >= start_date)
+    if end_date:
+        conditions.append(Transaction.operation_date <= end_date)
+    if category_id:
+        conditions.append(Transaction.category_id == category_id)
+    return conditions
+
+
+def _transaction_search(search: str):
+    """
+    Build the (condition, rank) pair for a free-text search.
+
+    Matches whole words through the `search_vector` full-text index, and partial or
+    misspelled words through the trigram indexes on description and merchant name.
+    """
+    ts_query = func.websearch_to_tsquery("simple", search)
+    term = literal(search)
+    condition = or_(
+        Transaction.search_vector.op("@@")(ts_query),
+        term.op("<%")(Transaction.description),
+        term.op("<%")(Transaction.merchant_name),
+    )
+    rank = func.greatest(
+        func.ts_rank(Transaction.search_vector, ts_query),
+        func.word_similarity(term, Transaction.description),
+        func.word_similarity(term, Transaction.merchant_name),
+    )
+    return condition, rank
+
+
+@router.get("/export")
+def export_transactions(
+    format: Literal["csv", "parquet"] = Query("csv", description="Export format: csv or parquet"),
+    month: Optional[int] = Query(None, ge=1, le=12),
+    year: Optional[int] = Query(None, ge=1900, le=2100),
+    start_date: Optional[date] = Query(None, description="Export transactions from this date onwards (YYYY-MM-DD)"),
+    end_date: Optional[date] = Query(None, description="Export transactions up to this date (YYYY-MM-DD)"),
+    category_id: Optional[int] = Query(None, description="Export transactions of this category ID"),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Export the current user's transactions as CSV or Parquet.
+
+    Accepts the same filters as the transaction list. The file is streamed from a
+    server-side cursor, so bytes start flowing immediately and memory use stays
+    constant however long the history is.
+    """
+    stmt = (
+        select(
+            Transaction.id,
+            Transaction.operation_date,
+            Transaction.description,
+            Transaction.amount,
+            Category.name,
+            Transaction.merchant_name,
+            Transaction.account_name,
+            Transaction.transaction_type,
+        )
+        .outerjoin(Category, Transaction.category_id == Category.id)
+        .where(
+            Transaction.user_id == current_user.id,
+            *_transaction_filters(month, year, start_date, end_date, category_id),
+        )
+        .order_by(desc(Transaction.operation_date), desc(Transaction.id))
+    )
+    export_service = TransactionExportService(stmt)
+
+    if format == "parquet":
+        return StreamingResponse(
+            export_service.stream_parquet(),
+            media_type="application/vnd.apache.parquet",
+            headers={"Content-Disposition": 'attachment; filename="transactions.parquet"'},
+        )
+    return StreamingResponse(
+        export_service.stream_csv(),
+        media_type="text/csv",
+        headers={"Content-Disposition": 'attachment; filename="transactions.csv"'},
+    )
+
+
+_transaction_rows_adapter = TypeAdapter(List[TransactionResponseRow])
+
+
+def _json_default(value):
+    # Amounts are DECIMAL(10, 2): at most 10 significant digits, which a float
+    # round-trips exactly, so the shortest float repr prints the stored value
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError
+
+
+def render_transaction_page(rows, page: int, page_size: int, total_transactions: int, total_pages: int) -> Response:
+    """
+    Serialize a page of transaction rows to a PaginatedTransactions JSON response.
+
+    Rows are (id, operation_date, description, amount, user_id, category_id,
+    category_name) tuples. They are validated in a single TypeAdapter pass and
+    encoded with orjson, skipping the per-row Pydantic models and FastAPI's second
+    validation against `response_model`.
+    """
+    transactions = _transaction_rows_adapter.validate_python([
+        {
+            "operation_date": operation_date,
+            "description": description,
+            "category": (
+                {"id": category_id, "name": category_name, "user_id": user_id}
+                if category_id else None
+            ),
+            "amount": amount,
+            "id": transaction_id,
+            "user_id": user_id,
+        }
+        for transaction_id, operation_date, description, amount, user_id, category_id, category_name in rows
+    ])
+    return Response(
+        content=orjson.dumps(
+            {
+                "transactions": transactions,
+                "page": page,
+                "page_size": page_size,
+                "total_transactions": total_transactions,
+                "total_pages": total_pages,
+            },
+            default=_json_default,
+        ),
+        media_type="application/json",
+    )
+
+
 @router.get("/", response_model=PaginatedTransactions)
 def get_transactions(
     page: int = Query(1, ge=1),
@@ -277,8 +428,10 @@ def get_transactions(
     start_date: Optional[date] = Query(None, description="Filter transactions from this date onwards (YYYY-MM-DD)"),
     end_date: Optional[date] = Query(None, description="Filter transactions up to this date (YYYY-MM-DD)"),
     category_id: Optional[int] = Query(None, description="Filter transactions by category ID"),
+    search: Optional[str] = Query(None, min_length=1, max_length=200, description="Search in description and merchant name"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
+    etag: str = Depends(data_version_etag),
 ):
     """
     Fetch paginated transactions for the current user.
@@ -289,82 +442,51 @@ def get_transactions(
     - `year`: Optional filter for year
     - `start_date`: Optional start date filter (YYYY-MM-DD)
     - `end_date`: Optional end date filter (YYYY-MM-DD)
+    - `search`: Optional full-text / fuzzy search over description and merchant name
 
-    Returns a list of transactions sorted by operation date in descending order.
+    Returns a list of transactions sorted by operation date in descending order,
+    or by search relevance when `search` is given.
     Includes transactions even if they don't have a category assigned.
     """
     # Calculate skip for pagination
     skip = (page - 1) * page_size
 
-    # Start building the query
-    query = db.query(Transaction).filter(Transaction.user_id == current_user.id)
-
-    # Apply filters if provided
-    if month:
-        query = query.filter(extract("month", Transaction.operation_date) == month)
-    if year:
-        query = query.filter(extract("year", Transaction.operation_date) == year)
-    if start_date:
-        query = query.filter(Transaction.operation_date >= start_date)
-    if end_date:
-        query = query.filter(Transaction.operation_date <= end_date)
-    if category_id:
-        query = query.filter(Transaction.category_id == category_id)
-
-    # Add ordering, pagination and execute
-    transactions_query_result = (
-        query
-        .order_by(desc(Transaction.operation_date))
+    conditions = [
+        Transaction.user_id == current_user.id,
+        *_transaction_filters(month, year, start_date, end_date, category_id),
+    ]
+    ordering = [desc(Transaction.operation_date)]
+    if search and search.strip():
+        search_condition, rank = _transaction_search(search.strip())
+        conditions.append(search_condition)
+        ordering = [desc(rank), desc(Transaction.operation_date), desc(Transaction.id)]
+
+    # Add ordering, pagination and execute, fetching only the columns the response needs
+    rows = db.execute(
+        select(
+            Transaction.id,
+            Transaction.operation_date,
+            Transaction.description,
+            Transaction.amount,
+            Transaction.user_id,
+            Transaction.category_id,
+            Category.name,
+        )
+        .outerjoin(Category, Transaction.category_id == Category.id)
+        .where(*conditions)
+        .order_by(*ordering)
         .offset(skip)
         .limit(page_size)
-        .all()
-    )
-
-    # Transform the query results to match the TransactionResponse model, handling null categories
-    transactions_response_list = []
-    for transaction in transactions_query_result:
-        category_data = None
-        if transaction.category_id:
-            category_data = CategoryInTransaction(
-                id=transaction.category_id,
-                name=transaction.category.name,
-                user_id=transaction.user_id
-            )
-        
-        transactions_response_list.append(
-            TransactionResponse(
-                id=transaction.id,
-                operation_date=transaction.operation_date,
-                description=transaction.description,
-                category=category_data, # Assign CategoryInTransaction or None
-                amount=transaction.amount,
-                user_id=transaction.user_id,
-            )
-        )
+    ).all()
 
     # Count total transactions with the same filters
-    count_query = db.query(func.count(Transaction.id)).filter(Transaction.user_id == current_user.id)
-    if start_date:
-        count_query = count_query.filter(Transaction.operation_date >= start_date)
-    if end_date:
-        count_query = count_query.filter(Transaction.operation_date <= end_date)
-    elif month is not None:
-        count_query = count_query.filter(extract('month', Transaction.operation_date) == month)
-        if year is not None:
-             count_query = count_query.filter(extract('year', Transaction.operation_date) == year)
-    elif year is not None:
-        count_query = count_query.filter(extract('year', Transaction.operation_date) == year)
-        
+    count_query = db.query(func.count(Transaction.id)).filter(*conditions)
     total_transactions = count_query.scalar()
     total_pages = (total_transactions + page_size - 1) // page_size
 
-    return {
-        "transactions": transactions_response_list,  # Use the correctly formatted list
-        "page": page,
-        "page_size": page_size,
-        "total_transactions": total_transactions,
-        "total_pages": total_pages,
-    }
+    response = render_transaction_page(rows, page, page_size, total_transactions, total_pages)
+    response.headers.update(cache_headers(etag))
+    return response
 
 
 @router.post("/", response_model=TransactionResponse)
@@ -384,21 +506,14 @@ def create_transaction(
         Decimal("0.01"), rounding=ROUND_HALF_UP
     )
 
-    sanitized_name = transaction_data.category.lower().replace(' ', '')
-    category = (
-        db.query(Category)
-        .filter(
-            func.lower(func.replace(Category.name, ' ', '')) == sanitized_name,
-            Category.user_id == current_user.id,
-        )
-        .first()
-    )
+    category_service = CategoryService(db)
+    category = category_service.find_by_name(current_user.id, transaction_data.category)
 
     if not category:
-        category = Category(name=transaction_data.category, user_id=current_user.id)
-        db.add(category)
-        db.commit()
-        db.refresh(category)
+        category_id = category_service.get_or_create_categories(
+            current_user.id, [transaction_data.category]
+        )[transaction_data.category]
+        category = db.get(Category, category_id)
 
     new_transaction = Transaction(
         operation_date=transaction_data.operation_date,
@@ -462,14 +577,7 @@ async def edit_transaction(
     
     category = None
     if transaction_data.category_name:
-        category = (
-            db.query(Category)
-            .filter(
-                Category.name.ilike(transaction_data.category_name),
-                Category.user_id == current_user.id,
-            )
-            .first()
-        )
+        category = CategoryService(db).find_by_name(current_user.id, transaction_data.category_name)
 
         if not category:
             raise HTTPException(
@@ -571,6 +679,81 @@ def delete_transaction(
     db.commit()
 
 
+@router.post("/bulk", response_model=TransactionBulkResult)
+def bulk_update_transactions(
+    bulk_data: TransactionBulkOperation,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Recategorize, edit or delete many transactions in one request.
+
+    - Runs as a single set-based UPDATE/DELETE scoped to the current user's transactions
+    - Categorization rules are upserted once per distinct merchant (or description
+      for transactions without a merchant), in the same database transaction
+    - Returns how many transactions were affected; ids that don't exist or belong
+      to another user are ignored
+    """
+    transaction_ids = set(bulk_data.transaction_ids)
+    owned = (
+        Transaction.id.in_(transaction_ids),
+        Transaction.user_id == current_user.id,
+    )
+
+    if bulk_data.operation == "delete":
+        result = db.execute(delete(Transaction).where(*owned))
+        db.commit()
+        return TransactionBulkResult(
+            operation=bulk_data.operation, requested=len(transaction_ids), affected=result.rowcount
+        )
+
+    values = {}
+    category = None
+    if bulk_data.category_name:
+        category = CategoryService(db).find_by_name(current_user.id, bulk_data.category_name)
+        if not category:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Category '{bulk_data.category_name}' not found or you do not have permission to use it",
+            )
+        values["category_id"] = category.id
+
+    if bulk_data.operation == "edit":
+        if bulk_data.description:
+            values["description"] = bulk_data.description
+        if bulk_data.operation_date:
+            values["operation_date"] = bulk_data.operation_date
+        if bulk_data.amount is not None:
+            values["amount"] = Decimal(bulk_data.amount).quantize(
+                Decimal("0.01"), rounding=ROUND_HALF_UP
+            )
+
+    if not values:
+        raise HTTPException(status_code=400, detail="No fields to update")
+
+    updated = db.execute(
+        update(Transaction)
+        .where(*owned)
+        .values(**values)
+        .returning(Transaction.merchant_name, Transaction.description)
+        .execution_options(synchronize_session=False)
+    ).all()
+
+    # Learn from the new category, once per distinct merchant / description
+    if category:
+        CategorizationService(db).bulk_upsert_rules(
+            user_id=current_user.id,
+            category_id=category.id,
+            merchant_names=[row.merchant_name for row in updated if row.merchant_name],
+            description_patterns=[row.description for row in updated if not row.merchant_name],
+        )
+
+    db.commit()
+    return TransactionBulkResult(
+        operation=bulk_data.operation, requested=len(transaction_ids), affected=len(updated)
+    )
+
+
 def _get_expenses_summary_data(month: int, db: Session, current_user: User):
     summary = (
         db.query(
@@ -606,12 +789,12 @@ def _get_expenses_summary_data(month: int, db: Session, current_user: User):
     return response_data
 
 
-@router.get('/expenses_summary', response_model=list[TransactionSummaryResponse])
+@router.get('/expenses_summary', response_model=list[TransactionSummaryResponse], dependencies=[Depends(data_version_etag)])
 def get_expenses_summary(month: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     return _get_expenses_summary_data(month, db, current_user)
 
 
-@router.get('/dashboard_summary', response_model=DashboardResponse)
+@router.get('/dashboard_summary', response_model=DashboardResponse, dependencies=[Depends(daily_data_version_etag)])
 def get_dashboard_summary(month: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     expenses_summary = get_expenses_summary(month=month, current_user=current_user, db=db)
     planned_amount = sum(item['limit'] for item in expenses_summary)
@@ -663,21 +846,68 @@ def get_dashboard_summary(month: int, current_user: User = Depends(get_current_u
     )
 
 
+def _merge_categories(db: Session, user_id: int, source_category_ids: List[int], target_category_id: int) -> CategoryMergeResult:
+    category_ids = set(source_category_ids) | {target_category_id}
+    owned_category_ids = {
+        row.id for row in db.query(Category.id).filter(Category.id.in_(category_ids), Category.user_id == user_id)
+    }
+    if owned_category_ids != category_ids:
+        raise HTTPException(status_code=404, detail=f"Categories not found: {sorted(category_ids - owned_category_ids)}")
+
+    counts = CategoryService(db).merge(user_id, source_category_ids, target_category_id)
+    db.commit()
+    return CategoryMergeResult(
+        target_category_id=target_category_id,
+        merged_category_ids=source_category_ids,
+        **counts,
+    )
+
+
+@router.post('/categories/merge', response_model=CategoryMergeResult)
+def merge_categories(
+    merge: CategoryMerge,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Merge source categories into a target category.
+
+    Transactions, categorization rules and main category links move to the target,
+    limits are summed into the target's limit per plan, and the source categories
+    are deleted, all in one transaction.
+    """
+    return _merge_categories(db, current_user.id, merge.source_category_ids, merge.target_category_id)
+
+
 @router.delete('/categories/{category_id}', status_code=204)
 async def delete_category(
     category_id: int,
+    merge_into: Optional[int] = Query(None, description="Move the category's transactions, limits and rules to this category first"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
+    if merge_into is not None:
+        if merge_into == category_id:
+            raise HTTPException(status_code=400, detail='Cannot merge a category into itself')
+        _merge_categories(db, current_user.id, [category_id], merge_into)
+        return
+
     db_category = db.query(Category).filter(Category.id == category_id, Category.user_id == current_user.id).first()
     if not db_category:
         raise HTTPException(status_code=404, detail='Category not found')
    
     db.delete(db_category)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=409,
+            detail='Category is still used by transactions, limits or rules; delete it with merge_into',
+        )
 
 
-@router.get('/categories/{category_id}/main-categories', response_model=dict)
+@router.get('/categories/{category_id}/main-categories', response_model=dict, dependencies=[Depends(data_version_etag)])
 def get_main_categories_by_category(
     category_id: int,
     db: Session = Depends(get_db),
@@ -1,7 +1,8 @@
 from pydantic import BaseModel, EmailStr, Field, validator
 from datetime import datetime, date
-from typing import Optional, List, Union
+from typing import Optional, List, Union, Literal
 from decimal import Decimal
+from typing_extensions import TypedDict
 
 
 # Base schemas
@@ -147,6 +148,35 @@ class TransactionEdit(BaseModel):
     user_id: int
 
 
+class TransactionBulkOperation(BaseModel):
+    """
+    Apply one operation to many transactions at once.
+
+    - `recategorize`: set `category_name` on all transactions
+    - `delete`: delete all transactions
+    - `edit`: set every provided field (`description`, `operation_date`, `amount`, `category_name`)
+    """
+
+    transaction_ids: List[int] = Field(..., min_length=1, max_length=10000)
+    operation: Literal["recategorize", "delete", "edit"]
+    category_name: Optional[str] = None
+    description: Optional[str] = None
+    operation_date: Optional[date] = None
+    amount: Optional[Decimal] = None
+
+    @validator("category_name", always=True)
+    def validate_category_name(cls, v, values):
+        if values.get("operation") == "recategorize" and not v:
+            raise ValueError("category_name is required for recategorize")
+        return v
+
+
+class TransactionBulkResult(BaseModel):
+    operation: str
+    requested: int
+    affected: int
+
+
 class TransactionResponse(TransactionBase):
     id: int
     user_id: int
@@ -212,6 +242,23 @@ class PaginatedTransactions(BaseModel):
     total_pages: int
 
 
+# Plain-dict mirrors of TransactionResponse for the fast list serialization path.
+# Validated in one pass by a TypeAdapter, without per-row model instances.
+class CategoryInTransactionRow(TypedDict):
+    id: int
+    name: str
+    user_id: int
+
+
+class TransactionResponseRow(TypedDict):
+    operation_date: date
+    description: str
+    category: Optional[CategoryInTransactionRow]
+    amount: Decimal
+    id: int
+    user_id: int
+
+
 # Summary and analytics schemas
 class CategorySummary(BaseModel):
     category: str
@@ -253,6 +300,26 @@ class CreateCategoryLimit(BaseModel):
     limit: Decimal
 
 
+class PlanMonth(BaseModel):
+    month: int = Field(..., ge=1, le=12)
+    year: int = Field(..., ge=1900, le=2100)
+
+
+class PlanRollover(BaseModel):
+    """Copy a plan's limits and income into other months"""
+    targets: List[PlanMonth] = Field(..., min_length=1, max_length=24)
+    scale_factor: Decimal = Field(Decimal(1), gt=0, le=100)
+    basis: Literal["limit", "actual"] = "limit"  # Scale the source limits or the source month's actual spending
+    overwrite: bool = False  # Replace limits and income already set in target plans
+
+    @validator("targets")
+    def unique_targets(cls, v):
+        months = [(target.year, target.month) for target in v]
+        if len(months) != len(set(months)):
+            raise ValueError("each month may appear only once")
+        return v
+
+
 class PlanResponse(BaseModel):
     id: int
     month: int
@@ -260,6 +327,33 @@ class PlanResponse(BaseModel):
     user_id: int
 
 
+class PlanReportCategory(BaseModel):
+    category_id: Optional[int]  # None for uncategorized spending
+    category_name: Optional[str]
+    limit: float
+    spent: float
+    variance: float  # limit - spent; negative means over budget
+
+
+class PlanReportMonth(BaseModel):
+    month: int
+    plan_id: Optional[int]
+    income: float
+    planned: float
+    spent: float
+    variance: float
+    categories: List[PlanReportCategory]
+
+
+class PlanYearReport(BaseModel):
+    year: int
+    income: float
+    planned: float
+    spent: float
+    variance: float
+    months: List[PlanReportMonth]
+
+
 class CategoryLimitResponse(BaseModel):
     id: int
     category_id: int
@@ -290,11 +384,47 @@ class CategoryEdit(BaseModel):
     name: str
 
 
+class CategoryMerge(BaseModel):
+    source_category_ids: List[int] = Field(..., min_length=1, max_length=1000)
+    target_category_id: int
+
+    @validator("source_category_ids")
+    def unique_sources(cls, v):
+        return list(dict.fromkeys(v))
+
+    @validator("target_category_id")
+    def target_not_in_sources(cls, v, values):
+        if v in values.get("source_category_ids", []):
+            raise ValueError("target category cannot be one of the source categories")
+        return v
+
+
+class CategoryMergeResult(BaseModel):
+    target_category_id: int
+    merged_category_ids: List[int]
+    transactions_moved: int
+    limits_merged: int
+    rules_moved: int
+
+
 class CategoryLimitCreate(BaseModel):
     category_id: int
     limit: float
 
 
+class CategoryLimitBulkUpsert(BaseModel):
+    """The full set of category limits for a plan"""
+    limits: List[CategoryLimitCreate] = Field(..., max_length=1000)
+    remove_missing: bool = False  # Delete the plan's limits for categories not in `limits`
+
+    @validator("limits")
+    def unique_categories(cls, v):
+        category_ids = [limit.category_id for limit in v]
+        if len(category_ids) != len(set(category_ids)):
+            raise ValueError("each category may appear only once")
+        return v
+
+
 class TransactionCategoryUpdate(BaseModel):
     category_id: int
 
@@ -342,6 +472,51 @@ class MainCategoryDetailResponse(MainCategoryResponse):
     categories: List[CategoryResponse]
 
 
+class MainCategoryCategoriesUpdate(BaseModel):
+    """The complete set of categories a main category should contain"""
+    category_ids: List[int] = Field(..., max_length=10000)
+
+
+class CategoryMainCategoryPair(BaseModel):
+    main_category_id: int
+    category_id: int
+
+
+class CategoryMainCategoryBulkUpdate(BaseModel):
+    add: List[CategoryMainCategoryPair] = Field([], max_length=10000)
+    remove: List[CategoryMainCategoryPair] = Field([], max_length=10000)
+
+
+class CategoryMainCategoryBulkResult(BaseModel):
+    added: int
+    removed: int
+
+
+class MainCategorySummaryCategory(BaseModel):
+    category_id: int
+    category_name: str
+    spent: float
+    limit: float
+    main_category_count: int  # > 1: the category also counts towards other main categories
+
+
+class MainCategorySummaryItem(BaseModel):
+    main_category_id: Optional[int]  # None groups categories without a main category
+    main_category_name: Optional[str]
+    spent: float
+    limit: float
+    categories: List[MainCategorySummaryCategory]
+
+
+class MainCategorySpendingSummary(BaseModel):
+    year: int
+    month: Optional[int]
+    total_spent: float  # Each category counted once, plus uncategorized spending
+    uncategorized_spent: float  # Transactions without a category
+    total_limit: float
+    main_categories: List[MainCategorySummaryItem]
+
+
 # Transaction filter rule schemas
 class TransactionFilterRuleBase(BaseModel):
     description_pattern: Optional[str] = None
@@ -371,3 +546,18 @@ class TransactionFilterRuleResponse(TransactionFilterRuleBase):
 
     class Config:
         orm_mode = True
+
+
+class TransactionFilterPreviewItem(BaseModel):
+    id: int
+    operation_date: Optional[date] = None
+    description: Optional[str] = None
+    merchant_name: Optional[str] = None
+    amount: Decimal
+
+
+class TransactionFilterRulePreviewResponse(BaseModel):
+    total_count: int
+    matched_count: int
+    matched_amount: Decimal
+    sample: List[TransactionFilterPreviewItem]
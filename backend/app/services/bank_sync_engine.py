@@ -0,0 +1,329 @@
+import asyncio
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple
+
+from sqlalchemy import String, any_, bindparam
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.orm import Session
+
+from ..models.transaction import BankAccountSyncState, BankConnection, Transaction
+from .categorization_service import CategorizationService, RuleCriteria
+from .filter_service import FilterRuleCriteria, TransactionFilterService
+from .truelayer_service import TrueLayerService
+
+
+class BankSyncEngine:
+    """
+    Imports bank transactions for a connection through a fixed pipeline:
+
+        fetch -> normalize -> dedupe -> filter -> categorize -> write
+
+    Every stage works on a whole batch of fetched transactions at once and is
+    timed, so the callback and refresh routes share one (fast) import path.
+
+    Each account keeps a sync cursor in `bank_account_sync_state`; after the first
+    sync only transactions from the account's own watermark onwards are fetched.
+
+    All database work in `sync` runs in worker threads (`asyncio.to_thread`), one
+    step at a time, so large imports don't block the event loop they run on.
+    """
+
+    WRITE_BATCH_SIZE = 1000
+
+    def __init__(self, db: Session, truelayer_service: TrueLayerService):
+        self.db = db
+        self.truelayer_service = truelayer_service
+        self.categorization_service = CategorizationService(db)
+        self.filter_service = TransactionFilterService(db)
+
+    async def sync(
+        self,
+        connection: BankConnection,
+        account_ids: List[str],
+        from_date: Optional[str] = None,
+        commit_progress: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Run the import pipeline for the given accounts of a connection.
+
+        Transactions are streamed from TrueLayer in date-window batches and each
+        batch goes through the remaining stages as it arrives. Accounts with a
+        stored sync cursor are fetched from their own watermark; `from_date` only
+        applies to accounts that have never been synced.
+
+        Does NOT commit, unless `commit_progress` is set: then every imported batch
+        is committed together with its cursor, so an interrupted sync resumes
+        where it stopped.
+
+        Returns:
+            Dict with transactions_imported, transactions_filtered,
+            transactions_skipped (already stored or income) and stage_timings (seconds)
+        """
+        timings: Dict[str, float] = {}
+        transactions_fetched = transactions_imported = transactions_filtered = 0
+        # Progress commits expire ORM instances; keep what every batch needs as plain values
+        connection_id, user_id = connection.id, connection.user_id
+
+        sync_states, filter_rules, categorization_rules = await asyncio.to_thread(
+            self._load_sync_context, connection
+        )
+        from_dates = {
+            account_id: state.last_transaction_date.isoformat()
+            for account_id, state in sync_states.items()
+            if state.last_transaction_date
+        }
+        batches = self.truelayer_service.stream_transactions_for_accounts(
+            connection.access_token, account_ids, from_date=from_date, from_dates=from_dates
+        )
+        try:
+            while True:
+                with self._timed("fetch", timings):
+                    item = await anext(batches, None)
+                if item is None:
+                    break
+
+                account_id, fetched = item
+                imported, filtered = await asyncio.to_thread(
+                    self._import_batch,
+                    connection_id,
+                    user_id,
+                    account_id,
+                    fetched,
+                    sync_states,
+                    filter_rules,
+                    categorization_rules,
+                    timings,
+                    commit_progress,
+                )
+
+                transactions_fetched += len(fetched)
+                transactions_imported += imported
+                transactions_filtered += filtered
+        finally:
+            await batches.aclose()
+
+        print(
+            f"Bank sync for connection {connection_id}: fetched {transactions_fetched}, "
+            f"imported {transactions_imported}, filtered {transactions_filtered}, "
+            "timings " + ", ".join(f"{stage}={seconds:.3f}s" for stage, seconds in timings.items())
+        )
+
+        return {
+            "transactions_imported": transactions_imported,
+            "transactions_filtered": transactions_filtered,
+            "transactions_skipped": transactions_fetched - transactions_imported - transactions_filtered,
+            "stage_timings": timings,
+        }
+
+    def _load_sync_context(
+        self, connection: BankConnection
+    ) -> Tuple[Dict[str, BankAccountSyncState], List[FilterRuleCriteria], List[RuleCriteria]]:
+        """
+        Load the sync cursors and the user's rules. Rules are loaded once per sync
+        rather than per batch, as plain values so that progress commits don't expire
+        them; edits made during a sync apply from the next one.
+        """
+        return (
+            self._load_sync_states(connection),
+            self.filter_service.get_active_criteria(connection.user_id),
+            self.categorization_service.get_rule_criteria(connection.user_id),
+        )
+
+    def _import_batch(
+        self,
+        connection_id: int,
+        user_id: int,
+        account_id: str,
+        fetched: List[Dict[str, Any]],
+        sync_states: Dict[str, BankAccountSyncState],
+        filter_rules: List[FilterRuleCriteria],
+        categorization_rules: List[RuleCriteria],
+        timings: Dict[str, float],
+        commit_progress: bool,
+    ) -> Tuple[int, int]:
+        """
+        Run one batch of an account's raw transactions through normalize -> write and
+        advance the account's cursor (committing if `commit_progress`). Blocking; `sync`
+        runs it in a worker thread. Returns (imported, filtered)
+        """
+        with self._timed("normalize", timings):
+            transactions = self._normalize(fetched, user_id, connection_id)
+
+        with self._timed("dedupe", timings):
+            transactions = self._dedupe(transactions)
+
+        with self._timed("filter", timings):
+            skip_mask = self.filter_service.get_skip_mask(user_id, transactions, filter_rules)
+            kept = [tx for tx, skip in zip(transactions, skip_mask) if not skip]
+
+        with self._timed("categorize", timings):
+            category_ids = self.categorization_service.categorize_batch(
+                user_id, kept, categorization_rules
+            )
+            for tx, category_id in zip(kept, category_ids):
+                tx["category_id"] = category_id
+
+        with self._timed("write", timings):
+            imported = self._bulk_write(kept)
+            self._advance_sync_states(connection_id, {account_id: fetched}, sync_states)
+            if commit_progress:
+                self.db.commit()
+
+        return imported, len(transactions) - len(kept)
+
+    def refresh_token_if_expiring(
+        self, connection: BankConnection, margin: timedelta = timedelta(0)
+    ) -> bool:
+        """
+        Refresh the connection's access token if it expires within `margin`.
+
+        TrueLayer rotates refresh tokens, so two concurrent refreshes (e.g. auto-sync
+        and the refresh route) would leave the loser holding a revoked token. Before
+        refreshing, the connection row is re-read with SELECT ... FOR UPDATE and the
+        expiry checked again, so only one caller refreshes and the others see its token.
+
+        Updates the connection in place (does NOT commit) and returns True if the
+        token was refreshed. The caller must commit or roll back right after, also
+        when False is returned, to release the row lock. Errors from TrueLayer are
+        propagated to the caller.
+        """
+        if not self._token_expiring(connection, margin):
+            return False
+
+        self.db.get(
+            BankConnection, connection.id, with_for_update=True, populate_existing=True
+        )
+        if not self._token_expiring(connection, margin):
+            return False  # Refreshed by someone else while we waited for the lock
+
+        token_data = self.truelayer_service.refresh_access_token(connection.refresh_token)
+        connection.access_token = token_data["access_token"]
+        connection.refresh_token = token_data["refresh_token"]
+        connection.token_expires_at = datetime.utcnow() + timedelta(
+            seconds=token_data["expires_in"]
+        )
+        return True
+
+    @staticmethod
+    def _token_expiring(connection: BankConnection, margin: timedelta) -> bool:
+        return not connection.token_expires_at or connection.token_expires_at <= datetime.utcnow() + margin
+
+    def latest_transaction_date(self, connection: BankConnection) -> Optional[str]:
+        """Date of the most recent bank transaction stored for the connection, as an ISO string"""
+        most_recent_transaction = (
+            self.db.query(Transaction)
+            .filter(
+                Transaction.bank_connection_id == connection.id,
+                Transaction.bank_transaction_id.isnot(None)  # Make sure it's a bank transaction
+            )
+            .order_by(Transaction.operation_date.desc())
+            .first()
+        )
+        if most_recent_transaction and most_recent_transaction.operation_date:
+            return most_recent_transaction.operation_date.isoformat()
+        return None
+
+    def _normalize(self, fetched: List[Dict[str, Any]], user_id: int, connection_id: int) -> List[Dict[str, Any]]:
+        """Format raw TrueLayer transactions and keep expenses only (amount < 0)"""
+        transactions = []
+        for tx_data in fetched:
+            tx_formatted = self.truelayer_service.format_transaction(
+                tx_data, user_id, connection_id
+            )
+            if tx_formatted["amount"] < 0:
+                transactions.append(tx_formatted)
+        return transactions
+
+    def _dedupe(self, transactions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Drop transactions already stored, or repeated within the batch, using one lookup query"""
+        bank_transaction_ids = list({tx["bank_transaction_id"] for tx in transactions})
+        if not bank_transaction_ids:
+            return transactions
+
+        rows = self.db.query(Transaction.bank_transaction_id).filter(
+            Transaction.bank_transaction_id == any_(
+                bindparam("bank_transaction_ids", bank_transaction_ids, type_=ARRAY(String))
+            )
+        )
+        seen = {row.bank_transaction_id for row in rows}
+
+        unique = []
+        for tx in transactions:
+            if tx["bank_transaction_id"] not in seen:
+                seen.add(tx["bank_transaction_id"])
+                unique.append(tx)
+        return unique
+
+    def _bulk_write(self, transactions: List[Dict[str, Any]]) -> int:
+        """Insert transactions in batches, ignoring ids inserted concurrently by another sync"""
+        inserted = 0
+        for start in range(0, len(transactions), self.WRITE_BATCH_SIZE):
+            batch = transactions[start:start + self.WRITE_BATCH_SIZE]
+            stmt = (
+                insert(Transaction)
+                .values(batch)
+                .on_conflict_do_nothing(index_elements=[Transaction.bank_transaction_id])
+                .returning(Transaction.id)
+            )
+            inserted += len(self.db.execute(stmt).all())
+        return inserted
+
+    def _load_sync_states(self, connection: BankConnection) -> Dict[str, BankAccountSyncState]:
+        states = self.db.query(BankAccountSyncState).filter(
+            BankAccountSyncState.bank_connection_id == connection.id
+        ).all()
+        return {state.account_id: state for state in states}
+
+    def _advance_sync_states(
+        self,
+        connection_id: int,
+        account_transactions: Dict[str, List[Dict[str, Any]]],
+        sync_states: Dict[str, BankAccountSyncState],
+    ) -> None:
+        """
+        Move each account's watermark to the newest transaction fetched.
+
+        The next sync starts from the watermark date itself (not the day after),
+        so transactions booked later on the same day are still picked up; the
+        overlap is removed by the dedupe stage.
+        """
+        now = datetime.utcnow()
+        for account_id, transactions in account_transactions.items():
+            state = sync_states.get(account_id)
+            if state is None:
+                state = BankAccountSyncState(
+                    bank_connection_id=connection_id, account_id=account_id
+                )
+                self.db.add(state)
+                sync_states[account_id] = state
+
+            state.last_synced_at = now
+            newest = max(
+                (tx for tx in transactions if tx.get("timestamp")),
+                key=lambda tx: self._parse_timestamp(tx["timestamp"]),
+                default=None,
+            )
+            if newest is None:
+                continue
+
+            newest_date = self._parse_timestamp(newest["timestamp"]).date()
+            if state.last_transaction_date is None or newest_date >= state.last_transaction_date:
+                state.last_transaction_date = newest_date
+                state.last_transaction_id = newest.get("transaction_id")
+
+        self.db.flush()
+
+    @staticmethod
+    def _parse_timestamp(timestamp: str) -> datetime:
+        return datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+
+    @staticmethod
+    @contextmanager
+    def _timed(stage: str, timings: Dict[str, float]):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - start
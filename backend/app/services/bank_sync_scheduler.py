@@ -0,0 +1,207 @@
+"""
+Periodic background sync of all bank connections.
+
+Runs either in-process (started from the FastAPI app when BANK_AUTO_SYNC=true)
+or as a separate worker, which keeps sync work out of the API process entirely:
+
+    python -m backend.app.services.bank_sync_scheduler
+
+In-process, all blocking work (database and TrueLayer calls) runs in worker
+threads so the API event loop stays responsive. However many API workers or
+scheduler processes are started, a Postgres advisory lock lets only one of them
+sync at a time; the others stand by and take over if it goes away.
+"""
+import asyncio
+import os
+import random
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import Connection, func, select
+from sqlalchemy.orm import Session
+
+from ..database.database import SessionLocal, engine
+from ..models.transaction import BankConnection
+from .bank_sync_engine import BankSyncEngine
+from .truelayer_service import TrueLayerService, get_truelayer_service
+
+
+class BankSyncScheduler:
+    """
+    Syncs every BankConnection on a fixed interval.
+
+    - each cycle is spread out with random jitter so connections don't hit
+      TrueLayer at the same moment
+    - at most `max_workers` connections sync at once (upstream calls are further
+      capped by TrueLayerService.MAX_UPSTREAM_CALLS)
+    - access tokens are refreshed before they expire, not after
+    - connections that fail are retried with exponential backoff
+    - only the process holding ADVISORY_LOCK_KEY runs cycles
+    """
+
+    SYNC_INTERVAL_SECONDS = 30 * 60
+    JITTER_SECONDS = 60
+    MAX_WORKERS = 4
+    TOKEN_REFRESH_MARGIN = timedelta(minutes=10)
+    BACKOFF_BASE_SECONDS = 5 * 60
+    BACKOFF_MAX_SECONDS = 12 * 60 * 60
+    # Session-level pg advisory lock held by the one process running auto-sync ("banksync")
+    ADVISORY_LOCK_KEY = 0x62616E6B73796E63
+
+    def __init__(
+        self,
+        truelayer_service: TrueLayerService,
+        interval_seconds: Optional[int] = None,
+        max_workers: Optional[int] = None,
+    ):
+        self.truelayer_service = truelayer_service
+        self.interval_seconds = interval_seconds or int(
+            os.getenv("BANK_SYNC_INTERVAL_SECONDS", self.SYNC_INTERVAL_SECONDS)
+        )
+        self.max_workers = max_workers or int(os.getenv("BANK_SYNC_MAX_WORKERS", self.MAX_WORKERS))
+        # connection id -> (consecutive failures, earliest next attempt)
+        self._backoff: Dict[int, Tuple[int, datetime]] = {}
+        self._stopped = asyncio.Event()
+        self._lock_connection: Optional[Connection] = None
+
+    async def run_forever(self) -> None:
+        """Run sync cycles until `stop` is called, while holding the scheduler lock"""
+        try:
+            while not self._stopped.is_set():
+                try:
+                    if await asyncio.to_thread(self._hold_lock):
+                        await self.run_once()
+                    else:
+                        print("Bank auto-sync: another process holds the scheduler lock, standing by")
+                except Exception as error:
+                    print(f"Bank auto-sync cycle failed: {str(error)}")
+
+                delay = self.interval_seconds + random.uniform(-self.JITTER_SECONDS, self.JITTER_SECONDS)
+                try:
+                    await asyncio.wait_for(self._stopped.wait(), timeout=max(delay, 1))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._release_lock()
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    def _hold_lock(self) -> bool:
+        """
+        Take the scheduler advisory lock, or check that we still hold it. Blocking.
+
+        The lock lives on a dedicated connection kept for as long as the scheduler
+        runs; if that connection drops, Postgres releases the lock and another
+        process can take over.
+        """
+        if self._lock_connection is not None:
+            try:
+                self._lock_connection.execute(select(1))
+                self._lock_connection.commit()
+                return True
+            except Exception:
+                self._release_lock()
+
+        connection = engine.connect()
+        try:
+            acquired = connection.execute(select(func.pg_try_advisory_lock(self.ADVISORY_LOCK_KEY))).scalar()
+            connection.commit()
+        except Exception:
+            connection.close()
+            raise
+
+        if acquired:
+            self._lock_connection = connection
+        else:
+            connection.close()
+        return acquired
+
+    def _release_lock(self) -> None:
+        if self._lock_connection is None:
+            return
+        # Discard the DBAPI connection rather than returning it to the pool, so the
+        # session-level lock goes away with it
+        self._lock_connection.invalidate()
+        self._lock_connection.close()
+        self._lock_connection = None
+
+    async def run_once(self) -> None:
+        """Sync all connections that are not backing off, `max_workers` at a time"""
+        connection_ids = await asyncio.to_thread(self._load_connection_ids)
+
+        now = datetime.utcnow()
+        due = [
+            connection_id for connection_id in connection_ids
+            if self._backoff.get(connection_id, (0, now))[1] <= now
+        ]
+
+        workers = asyncio.Semaphore(self.max_workers)
+
+        async def worker(connection_id: int) -> None:
+            await asyncio.sleep(random.uniform(0, self.JITTER_SECONDS))
+            async with workers:
+                await self._sync_connection(connection_id)
+
+        await asyncio.gather(*(worker(connection_id) for connection_id in due))
+
+    @staticmethod
+    def _load_connection_ids() -> List[int]:
+        db = SessionLocal()
+        try:
+            return [row.id for row in db.query(BankConnection.id).all()]
+        finally:
+            db.close()
+
+    def _prepare_connection(
+        self, db: Session, sync_engine: BankSyncEngine, connection_id: int
+    ) -> Optional[BankConnection]:
+        """Load a connection and refresh its token if it expires soon. Blocking."""
+        connection = db.get(BankConnection, connection_id)
+        if connection:
+            sync_engine.refresh_token_if_expiring(connection, self.TOKEN_REFRESH_MARGIN)
+            db.commit()  # Also releases the row lock taken for a refresh
+            db.refresh(connection)
+        return connection
+
+    async def _sync_connection(self, connection_id: int) -> None:
+        db = SessionLocal()
+        try:
+            sync_engine = BankSyncEngine(db, self.truelayer_service)
+            connection = await asyncio.to_thread(
+                self._prepare_connection, db, sync_engine, connection_id
+            )
+            if not connection:
+                self._backoff.pop(connection_id, None)
+                return
+
+            accounts = await asyncio.to_thread(
+                self.truelayer_service.get_accounts, connection.access_token
+            )
+            from_date = await asyncio.to_thread(sync_engine.latest_transaction_date, connection)
+            await sync_engine.sync(
+                connection,
+                [account_data["account_id"] for account_data in accounts],
+                from_date=from_date,
+                commit_progress=True,
+            )
+            await asyncio.to_thread(db.commit)
+            self._backoff.pop(connection_id, None)
+        except Exception as error:
+            await asyncio.to_thread(db.rollback)
+            failures = self._backoff.get(connection_id, (0, None))[0] + 1
+            delay = min(self.BACKOFF_BASE_SECONDS * 2 ** (failures - 1), self.BACKOFF_MAX_SECONDS)
+            self._backoff[connection_id] = (
+                failures,
+                datetime.utcnow() + timedelta(seconds=delay * random.uniform(0.8, 1.2)),
+            )
+            print(
+                f"Bank auto-sync failed for connection {connection_id} "
+                f"(attempt {failures}, retrying in ~{delay}s): {str(error)}"
+            )
+        finally:
+            await asyncio.to_thread(db.close)
+
+
+if __name__ == "__main__":
+    asyncio.run(BankSyncScheduler(get_truelayer_service()).run_forever())
@@ -1,7 +1,18 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import select, or_
+from sqlalchemy import select, or_, func
+from sqlalchemy.dialects.postgresql import insert
 from ..models import Transaction, CategorizationRule, Category
-from typing import Optional, List, Tuple
+from typing import Optional, List, NamedTuple, Sequence, Tuple, Dict, Any
+
+
+class RuleCriteria(NamedTuple):
+    """
+    Plain copy of a categorization rule. Unlike CategorizationRule instances it is
+    not expired by session commits, so it can be reused across a long import.
+    """
+    description_pattern: Optional[str]
+    merchant_name: Optional[str]
+    category_id: int
 
 
 class CategorizationService:
@@ -68,6 +79,59 @@ class CategorizationService:
             
         return None
 
+    def get_rule_criteria(self, user_id: int) -> List[RuleCriteria]:
+        """All of the user's rules as plain values, in the order `categorize_batch` matches them"""
+        rows = self.db.query(
+            CategorizationRule.description_pattern,
+            CategorizationRule.merchant_name,
+            CategorizationRule.category_id,
+        ).filter(
+            CategorizationRule.user_id == user_id
+        ).order_by(CategorizationRule.id).all()
+        return [RuleCriteria(*row) for row in rows]
+
+    def categorize_batch(
+        self,
+        user_id: int,
+        transactions: List[Dict[str, Any]],
+        rules: Optional[Sequence[RuleCriteria]] = None,
+    ) -> List[Optional[int]]:
+        """
+        Batch version of `apply_category_to_transaction` for formatted transaction dicts.
+
+        Matches in memory against the user's rules, using the same precedence as
+        `find_matching_rule`: description patterns contained in the description
+        first, then an exact merchant name match. `rules` (from `get_rule_criteria`) lets
+        callers categorizing many batches load them once; they are loaded here when
+        omitted. Returns a category id (or None) per transaction. Does NOT commit.
+        """
+        if rules is None:
+            rules = self.get_rule_criteria(user_id)
+
+        description_rules = [
+            (rule.description_pattern, rule.category_id)
+            for rule in rules if rule.description_pattern
+        ]
+        merchant_rules = {
+            rule.merchant_name: rule.category_id
+            for rule in rules if rule.merchant_name
+        }
+
+        category_ids = []
+        for tx in transactions:
+            description = tx.get("description")
+            category_id = None
+            if description:
+                category_id = next(
+                    (cat_id for pattern, cat_id in description_rules if pattern in description),
+                    None,
+                )
+            if category_id is None and tx.get("merchant_name"):
+                category_id = merchant_rules.get(tx["merchant_name"])
+            category_ids.append(category_id)
+
+        return category_ids
+
     def learn_and_apply_category(
         self, transaction_id: int, category_id: int, user_id: int
     ) -> None:
@@ -168,3 +232,33 @@ class CategorizationService:
             self.db.add(new_rule)
 
         # Commit is handled by the calling function (e.g., learn_and_apply_category)
+
+    def bulk_upsert_rules(
+        self,
+        user_id: int,
+        category_id: int,
+        merchant_names: List[str] = (),
+        description_patterns: List[str] = (),
+    ) -> None:
+        """
+        Point the rules for many merchants / description patterns at one category.
+
+        Set-based version of `create_or_update_rule`: one INSERT ... ON CONFLICT
+        per rule kind, regardless of how many distinct merchants are involved.
+        Does NOT commit.
+        """
+        for column, constraint, values in (
+            ("merchant_name", "_user_merchant_uc", set(filter(None, merchant_names))),
+            ("description_pattern", "_user_description_pattern_uc", set(filter(None, description_patterns))),
+        ):
+            if not values:
+                continue
+            stmt = insert(CategorizationRule).values([
+                {"user_id": user_id, "category_id": category_id, column: value}
+                for value in sorted(values)
+            ])
+            stmt = stmt.on_conflict_do_update(
+                constraint=constraint,
+                set_={"category_id": stmt.excluded.category_id, "updated_at": func.now()},
+            )
+            self.db.execute(stmt)
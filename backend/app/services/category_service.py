@@ -0,0 +1,134 @@
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import delete, func, literal, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from ..models import CategorizationRule, Category, CategoryLimit, Transaction
+from ..models.transaction import category_main_category
+
+
+class CategoryService:
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    @staticmethod
+    def normalize_name(name: str) -> str:
+        """Python side of the `categories.normalized_name` generated column"""
+        return name.replace(" ", "").lower()
+
+    def find_by_name(self, user_id: int, name: str) -> Optional[Category]:
+        """Find a category by name, ignoring case and spaces, through the normalized name index"""
+        return (
+            self.db.query(Category)
+            .filter(Category.user_id == user_id, Category.normalized_name == self.normalize_name(name))
+            .first()
+        )
+
+    def get_or_create_categories(self, user_id: int, names: Iterable[str]) -> Dict[str, int]:
+        """
+        Map category names to ids, creating missing categories. Does NOT commit.
+
+        Meant for batch paths: one INSERT ... ON CONFLICT DO NOTHING for all missing
+        names and one lookup, whatever the number of names. Names that normalize to
+        the same key share a category; new categories keep the first name given.
+        """
+        names = list(names)
+        names_by_key: Dict[str, str] = {}
+        for name in names:
+            names_by_key.setdefault(self.normalize_name(name), name)
+        if not names_by_key:
+            return {}
+
+        self.db.execute(
+            insert(Category)
+            .values([{"name": name, "user_id": user_id} for name in names_by_key.values()])
+            .on_conflict_do_nothing()
+        )
+        ids_by_key = dict(
+            self.db.execute(
+                select(Category.normalized_name, Category.id).where(
+                    Category.user_id == user_id, Category.normalized_name.in_(names_by_key)
+                )
+            ).all()
+        )
+        return {name: ids_by_key[self.normalize_name(name)] for name in names}
+
+    def merge(self, user_id: int, source_category_ids: List[int], target_category_id: int) -> Dict[str, int]:
+        """
+        Merge source categories into a target category and delete the sources. Does NOT commit.
+
+        Everything referencing a source category is moved with set-based statements, so
+        the cost does not grow with the number of ORM objects:
+        - transactions and categorization rules are re-pointed at the target
+        - category limits are folded per plan: the target's limit becomes the sum of
+          its own and the sources' limits in that plan
+        - main category links are carried over to the target (without duplicates)
+
+        The caller must have checked that all categories belong to `user_id`.
+
+        Returns counts of moved transactions, folded limits and moved rules.
+        """
+        transactions_moved = self.db.execute(
+            update(Transaction)
+            .where(Transaction.user_id == user_id, Transaction.category_id.in_(source_category_ids))
+            .values(category_id=target_category_id)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+
+        rules_moved = self.db.execute(
+            update(CategorizationRule)
+            .where(CategorizationRule.user_id == user_id, CategorizationRule.category_id.in_(source_category_ids))
+            .values(category_id=target_category_id)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+
+        limits_insert = insert(CategoryLimit).from_select(
+            ["category_id", "user_id", "plan_id", "limit"],
+            select(
+                literal(target_category_id),
+                CategoryLimit.user_id,
+                CategoryLimit.plan_id,
+                func.sum(CategoryLimit.limit),
+            )
+            .where(CategoryLimit.user_id == user_id, CategoryLimit.category_id.in_(source_category_ids))
+            .group_by(CategoryLimit.user_id, CategoryLimit.plan_id),
+        )
+        limits_merged = self.db.execute(
+            limits_insert.on_conflict_do_update(
+                constraint="_category_plan_uc",
+                set_={"limit": CategoryLimit.limit + limits_insert.excluded.limit},
+            )
+        ).rowcount
+        self.db.execute(
+            delete(CategoryLimit)
+            .where(CategoryLimit.user_id == user_id, CategoryLimit.category_id.in_(source_category_ids))
+            .execution_options(synchronize_session=False)
+        )
+
+        self.db.execute(
+            insert(category_main_category)
+            .from_select(
+                ["category_id", "main_category_id"],
+                select(literal(target_category_id), category_main_category.c.main_category_id)
+                .where(category_main_category.c.category_id.in_(source_category_ids))
+                .distinct(),
+            )
+            .on_conflict_do_nothing()
+        )
+        self.db.execute(
+            delete(category_main_category).where(category_main_category.c.category_id.in_(source_category_ids))
+        )
+
+        self.db.execute(
+            delete(Category)
+            .where(Category.user_id == user_id, Category.id.in_(source_category_ids))
+            .execution_options(synchronize_session=False)
+        )
+
+        return {
+            "transactions_moved": transactions_moved,
+            "limits_merged": limits_merged,
+            "rules_moved": rules_moved,
+        }
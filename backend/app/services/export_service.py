@@ -0,0 +1,110 @@
+import csv
+import io
+from typing import Any, Iterator, List
+
+from sqlalchemy import Select
+
+from ..database.database import SessionLocal
+
+EXPORT_COLUMNS = [
+    "id",
+    "operation_date",
+    "description",
+    "amount",
+    "category",
+    "merchant_name",
+    "account_name",
+    "transaction_type",
+]
+
+
+class _ByteSink:
+    """Write-only file object that hands written bytes out in chunks while tracking the position"""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+class TransactionExportService:
+    """
+    Streams query results as CSV or Parquet.
+
+    Rows are read through a server-side cursor (`yield_per`) in its own session,
+    because the request's session is closed before a StreamingResponse body runs.
+    Memory use is bounded by BATCH_SIZE regardless of how many rows are exported.
+    """
+
+    BATCH_SIZE = 2000
+
+    def __init__(self, stmt: Select):
+        self.stmt = stmt
+
+    def _iter_batches(self) -> Iterator[List[Any]]:
+        db = SessionLocal()
+        try:
+            result = db.execute(self.stmt.execution_options(yield_per=self.BATCH_SIZE))
+            for batch in result.partitions():
+                yield batch
+        finally:
+            db.close()
+
+    def stream_csv(self) -> Iterator[str]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_COLUMNS)
+        yield buffer.getvalue()
+
+        for batch in self._iter_batches():
+            buffer.seek(0)
+            buffer.truncate(0)
+            writer.writerows(batch)
+            yield buffer.getvalue()
+
+    def stream_parquet(self) -> Iterator[bytes]:
+        """Write one Parquet row group per batch and yield the bytes as they are produced"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = pa.schema([
+            ("id", pa.int64()),
+            ("operation_date", pa.date32()),
+            ("description", pa.string()),
+            ("amount", pa.decimal128(10, 2)),
+            ("category", pa.string()),
+            ("merchant_name", pa.string()),
+            ("account_name", pa.string()),
+            ("transaction_type", pa.string()),
+        ])
+
+        sink = _ByteSink()
+        with pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema) as writer:
+            for batch in self._iter_batches():
+                columns = list(zip(*batch))
+                writer.write_table(pa.Table.from_arrays(
+                    [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+                    schema=schema,
+                ))
+                yield sink.drain()
+        yield sink.drain()
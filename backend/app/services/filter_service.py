@@ -1,7 +1,21 @@
 from sqlalchemy.orm import Session
+from sqlalchemy import func, or_, and_
 from decimal import Decimal
-from typing import Dict, Any, List, Optional
-from ..models.transaction import TransactionFilterRule
+from typing import Dict, Any, List, NamedTuple, Optional, Sequence
+import numpy as np
+import pandas as pd
+from ..models.transaction import TransactionFilterRule, Transaction
+
+
+class FilterRuleCriteria(NamedTuple):
+    """
+    Plain copy of a filter rule's criteria. Unlike TransactionFilterRule instances it
+    is not expired by session commits, so it can be reused across a long import.
+    """
+    description_pattern: Optional[str]
+    merchant_name: Optional[str]
+    min_amount: Optional[Decimal]
+    max_amount: Optional[Decimal]
 
 
 class TransactionFilterService:
@@ -19,11 +33,7 @@ class TransactionFilterService:
         Returns:
             bool: True if transaction should be skipped, False otherwise
         """
-        # Get all active filter rules for this user
-        rules = self.db.query(TransactionFilterRule).filter(
-            TransactionFilterRule.user_id == user_id,
-            TransactionFilterRule.is_active == True
-        ).all()
+        rules = self.get_active_rules(user_id)
         
         if not rules:
             return False  # No rules, don't skip
@@ -35,6 +45,94 @@ class TransactionFilterService:
                 
         return False  # No matching rules, don't skip
     
+    def get_active_rules(self, user_id: int) -> List[TransactionFilterRule]:
+        """
+        Get all active filter rules for a user.
+        """
+        return self.db.query(TransactionFilterRule).filter(
+            TransactionFilterRule.user_id == user_id,
+            TransactionFilterRule.is_active == True
+        ).all()
+
+    def get_active_criteria(self, user_id: int) -> List[FilterRuleCriteria]:
+        """
+        Criteria of all active filter rules for a user, as plain values.
+        """
+        rows = self.db.query(
+            TransactionFilterRule.description_pattern,
+            TransactionFilterRule.merchant_name,
+            TransactionFilterRule.min_amount,
+            TransactionFilterRule.max_amount,
+        ).filter(
+            TransactionFilterRule.user_id == user_id,
+            TransactionFilterRule.is_active == True
+        ).all()
+        return [FilterRuleCriteria(*row) for row in rows]
+
+    def get_skip_mask(
+        self,
+        user_id: int,
+        transactions: List[Dict[str, Any]],
+        rules: Optional[Sequence[FilterRuleCriteria]] = None
+    ) -> np.ndarray:
+        """
+        Batch version of `should_skip_transaction`.
+
+        Evaluates all of the user's active rules against a whole page of formatted
+        transactions using column operations, so the cost is a few array
+        operations per rule instead of a Python loop per rule per row.
+
+        Args:
+            user_id: The ID of the user
+            transactions: Formatted transactions (see TrueLayerService.format_transaction)
+            rules: The user's active rule criteria, as returned by `get_active_criteria`.
+                Callers evaluating many batches (e.g. a bank sync) load them once and
+                pass them in; loaded here when omitted.
+
+        Returns:
+            np.ndarray: Boolean mask aligned with `transactions`, True where the
+            transaction should be skipped
+        """
+        mask = np.zeros(len(transactions), dtype=bool)
+        if not transactions:
+            return mask
+
+        if rules is None:
+            rules = self.get_active_criteria(user_id)
+        if not rules:
+            return mask
+
+        frame = pd.DataFrame.from_records(
+            transactions, columns=["description", "merchant_name", "amount"]
+        )
+        descriptions = frame["description"].fillna("").astype(str)
+        merchants = frame["merchant_name"].fillna("").astype(str)
+
+        # Compare amounts as integer cents (columns are DECIMAL(10, 2)) to keep
+        # the same exact semantics as the Decimal comparisons in the row path
+        amounts = pd.to_numeric(frame["amount"], errors="coerce").to_numpy(dtype=float)
+        has_amount = ~np.isnan(amounts)
+        cents = np.rint(np.abs(np.nan_to_num(amounts)) * 100).astype(np.int64)
+
+        for rule in rules:
+            if rule.description_pattern:
+                mask |= descriptions.str.contains(rule.description_pattern, regex=False).to_numpy()
+            if rule.merchant_name:
+                mask |= merchants.str.contains(rule.merchant_name, regex=False).to_numpy()
+            if rule.min_amount is not None or rule.max_amount is not None:
+                in_range = has_amount.copy()
+                if rule.min_amount is not None:
+                    in_range &= cents >= self._to_cents(rule.min_amount)
+                if rule.max_amount is not None:
+                    in_range &= cents <= self._to_cents(rule.max_amount)
+                mask |= in_range
+
+        return mask
+
+    @staticmethod
+    def _to_cents(amount: Decimal) -> int:
+        return int((Decimal(str(amount)) * 100).to_integral_value())
+
     def _rule_matches_transaction(self, rule: TransactionFilterRule, tx_data: Dict[str, Any]) -> bool:
         """
         Check if a particular rule matches the transaction.
@@ -178,6 +276,78 @@ class TransactionFilterService:
         self.db.commit()
         return True
     
+    def preview_filter_rule(
+        self,
+        user_id: int,
+        description_pattern: Optional[str] = None,
+        merchant_name: Optional[str] = None,
+        min_amount: Optional[Decimal] = None,
+        max_amount: Optional[Decimal] = None,
+        sample_size: int = 10
+    ) -> Dict[str, Any]:
+        """
+        Evaluate a candidate filter rule against the user's stored expense transactions.
+
+        The rule is translated into SQL predicates (substring matches are served by
+        the trigram indexes on description and merchant_name), so only the
+        aggregates and a small sample are returned from the database.
+
+        Returns:
+            Dict with total_count, matched_count, matched_amount and sample
+        """
+        if not any([description_pattern, merchant_name, min_amount, max_amount]):
+            raise ValueError("At least one filter criterion must be provided")
+
+        matches = self._rule_condition(description_pattern, merchant_name, min_amount, max_amount)
+        expenses = and_(Transaction.user_id == user_id, Transaction.amount < 0)
+
+        total_count, matched_count, matched_amount = self.db.query(
+            func.count(Transaction.id),
+            func.count(Transaction.id).filter(matches),
+            func.coalesce(func.sum(Transaction.amount).filter(matches), 0),
+        ).filter(expenses).one()
+
+        sample = self.db.query(
+            Transaction.id,
+            Transaction.operation_date,
+            Transaction.description,
+            Transaction.merchant_name,
+            Transaction.amount,
+        ).filter(expenses, matches).order_by(
+            Transaction.operation_date.desc()
+        ).limit(sample_size).all()
+
+        return {
+            "total_count": total_count,
+            "matched_count": matched_count,
+            "matched_amount": matched_amount,
+            "sample": [row._asdict() for row in sample],
+        }
+
+    @staticmethod
+    def _rule_condition(
+        description_pattern: Optional[str],
+        merchant_name: Optional[str],
+        min_amount: Optional[Decimal],
+        max_amount: Optional[Decimal]
+    ):
+        """
+        SQL equivalent of `_rule_matches_transaction` for a single rule.
+        """
+        conditions = []
+        if description_pattern:
+            conditions.append(Transaction.description.contains(description_pattern, autoescape=True))
+        if merchant_name:
+            conditions.append(Transaction.merchant_name.contains(merchant_name, autoescape=True))
+        if min_amount is not None or max_amount is not None:
+            amount_conditions = []
+            if min_amount is not None:
+                amount_conditions.append(func.abs(Transaction.amount) >= min_amount)
+            if max_amount is not None:
+                amount_conditions.append(func.abs(Transaction.amount) <= max_amount)
+            conditions.append(and_(*amount_conditions))
+        return or_(*conditions)
+
     def get_filter_rules(self, user_id: int) -> List[TransactionFilterRule]:
         """
         Get all filter rules for a user.
@@ -0,0 +1,277 @@
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Literal, Set, Tuple
+
+from sqlalchemy import Integer, and_, cast, column, extract, func, literal, select, true, tuple_, values
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from ..models.transaction import Category, CategoryLimit, Plan, PlanIncome, Transaction
+
+
+class PlanService:
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_or_create_plan(self, user_id: int, year: int, month: int) -> Plan:
+        """Get or create the user's plan for a month (see `ensure_plans`). Does NOT commit."""
+        return self.ensure_plans(user_id, [(year, month)])[(year, month)]
+
+    def ensure_plans(self, user_id: int, months: List[Tuple[int, int]]) -> Dict[Tuple[int, int], Plan]:
+        """
+        Get or create the user's plans for the given (year, month) pairs. Does NOT commit.
+
+        Existing plans are read first, so resolving plans that already exist (the
+        common case, e.g. on GETs) writes nothing: no data_version bump and no
+        sequence values used. Missing plans are created with INSERT ... ON CONFLICT
+        (user_id, year, month) DO NOTHING RETURNING; months that a concurrent caller
+        created in the meantime are read back, so every caller resolves the same plan.
+
+        Returns a map of (year, month) -> Plan.
+        """
+        wanted = set(months)
+        plans = self._find_plans(user_id, wanted)
+        missing = wanted - plans.keys()
+        if not missing:
+            return plans
+
+        targets = values(
+            column("year", Integer), column("month", Integer), name="targets"
+        ).data(sorted(missing))
+        stmt = (
+            insert(Plan)
+            .from_select(["year", "month", "user_id"], select(targets.c.year, targets.c.month, literal(user_id)))
+            .on_conflict_do_nothing(constraint="_plan_user_year_month_uc")
+            .returning(Plan)
+        )
+        for plan in self.db.scalars(stmt):
+            plans[(plan.year, plan.month)] = plan
+
+        missing -= plans.keys()
+        if missing:
+            plans.update(self._find_plans(user_id, missing))
+        return plans
+
+    def _find_plans(self, user_id: int, months: Set[Tuple[int, int]]) -> Dict[Tuple[int, int], Plan]:
+        plans = self.db.scalars(
+            select(Plan).where(
+                Plan.user_id == user_id,
+                tuple_(Plan.year, Plan.month).in_(sorted(months)),
+            )
+        )
+        return {(plan.year, plan.month): plan for plan in plans}
+
+    def rollover(
+        self,
+        source_plan: Plan,
+        months: List[Tuple[int, int]],
+        scale_factor: Decimal = Decimal(1),
+        basis: Literal["limit", "actual"] = "limit",
+        overwrite: bool = False,
+    ) -> List[Plan]:
+        """
+        Copy a plan's category limits and income into the plans of the given
+        (year, month) pairs, creating those plans as needed. Does NOT commit.
+
+        Each new limit is `basis * scale_factor`, where basis is the source limit or,
+        with basis="actual", what was actually spent in that category in the source
+        plan's month. Limits and income already set in a target plan are kept unless
+        `overwrite` is set.
+
+        Runs as a fixed batch of statements regardless of the number of months:
+        plan upsert, limits INSERT ... SELECT, income INSERT ... SELECT.
+        """
+        user_id = source_plan.user_id
+        plans = self.ensure_plans(user_id, months)
+        target_plans = values(column("plan_id", Integer), name="target_plans").data(
+            [(plans[month].id,) for month in months]
+        )
+
+        if basis == "actual":
+            month_start = date(source_plan.year, source_plan.month, 1)
+            month_end = date(source_plan.year + source_plan.month // 12, source_plan.month % 12 + 1, 1)
+            spent = (
+                select(
+                    Transaction.category_id,
+                    (-func.sum(Transaction.amount)).label("spent"),
+                )
+                .where(
+                    Transaction.user_id == user_id,
+                    Transaction.amount < 0,
+                    Transaction.operation_date >= month_start,
+                    Transaction.operation_date < month_end,
+                )
+                .group_by(Transaction.category_id)
+                .subquery()
+            )
+            base = func.coalesce(spent.c.spent, 0)
+        else:
+            base = CategoryLimit.limit
+
+        limits_select = (
+            select(
+                CategoryLimit.category_id,
+                CategoryLimit.user_id,
+                target_plans.c.plan_id,
+                func.round(base * scale_factor, 2),
+            )
+            .select_from(CategoryLimit)
+            .join(target_plans, true())
+            .where(CategoryLimit.plan_id == source_plan.id, CategoryLimit.user_id == user_id)
+        )
+        if basis == "actual":
+            limits_select = limits_select.outerjoin(spent, spent.c.category_id == CategoryLimit.category_id)
+
+        limits_insert = insert(CategoryLimit).from_select(
+            ["category_id", "user_id", "plan_id", "limit"], limits_select
+        )
+        if overwrite:
+            limits_insert = limits_insert.on_conflict_do_update(
+                constraint="_category_plan_uc", set_={"limit": limits_insert.excluded.limit}
+            )
+        else:
+            limits_insert = limits_insert.on_conflict_do_nothing(constraint="_category_plan_uc")
+        self.db.execute(limits_insert)
+
+        now = datetime.utcnow()
+        income_insert = insert(PlanIncome).from_select(
+            ["plan_id", "user_id", "amount", "description", "created_at", "updated_at"],
+            select(
+                target_plans.c.plan_id,
+                PlanIncome.user_id,
+                PlanIncome.amount,
+                PlanIncome.description,
+                literal(now),
+                literal(now),
+            )
+            .select_from(PlanIncome)
+            .join(target_plans, true())
+            .where(PlanIncome.plan_id == source_plan.id, PlanIncome.user_id == user_id),
+        )
+        if overwrite:
+            income_insert = income_insert.on_conflict_do_update(
+                constraint="_plan_user_income_uc",
+                set_={
+                    "amount": income_insert.excluded.amount,
+                    "description": income_insert.excluded.description,
+                    "updated_at": income_insert.excluded.updated_at,
+                },
+            )
+        else:
+            income_insert = income_insert.on_conflict_do_nothing(constraint="_plan_user_income_uc")
+        self.db.execute(income_insert)
+
+        return [plans[month] for month in months]
+
+    def yearly_report(self, user_id: int, year: int) -> Dict[str, Any]:
+        """
+        Plan-vs-actual figures for every month of a year and every category.
+
+        Computed by one query: the 12 months, left-joined with the month's plan, its
+        income, and the full outer join of its category limits with the month's
+        expense totals per category (so unplanned spending shows up as well).
+        Variance is limit minus spent: positive means under budget.
+        """
+        months = select(func.generate_series(1, 12).label("month")).subquery("months")
+        year_plans = (
+            select(Plan.month, Plan.id.label("plan_id"))
+            .where(Plan.user_id == user_id, Plan.year == year)
+            .subquery("year_plans")
+        )
+        incomes = (
+            select(year_plans.c.month, func.sum(PlanIncome.amount).label("income"))
+            .join(year_plans, PlanIncome.plan_id == year_plans.c.plan_id)
+            .where(PlanIncome.user_id == user_id)
+            .group_by(year_plans.c.month)
+            .subquery("incomes")
+        )
+        limits = (
+            select(year_plans.c.month, CategoryLimit.category_id, func.sum(CategoryLimit.limit).label("limit"))
+            .join(year_plans, CategoryLimit.plan_id == year_plans.c.plan_id)
+            .where(CategoryLimit.user_id == user_id)
+            .group_by(year_plans.c.month, CategoryLimit.category_id)
+            .subquery("limits")
+        )
+        transaction_month = cast(extract("month", Transaction.operation_date), Integer)
+        spent = (
+            select(
+                transaction_month.label("month"),
+                Transaction.category_id,
+                (-func.sum(Transaction.amount)).label("spent"),
+            )
+            .where(
+                Transaction.user_id == user_id,
+                Transaction.amount < 0,
+                Transaction.operation_date >= date(year, 1, 1),
+                Transaction.operation_date < date(year + 1, 1, 1),
+            )
+            .group_by(transaction_month, Transaction.category_id)
+            .subquery("spent")
+        )
+        category_months = (
+            select(
+                func.coalesce(limits.c.month, spent.c.month).label("month"),
+                func.coalesce(limits.c.category_id, spent.c.category_id).label("category_id"),
+                func.coalesce(limits.c.limit, 0).label("limit"),
+                func.coalesce(spent.c.spent, 0).label("spent"),
+            )
+            .select_from(limits.join(
+                spent,
+                and_(limits.c.month == spent.c.month, limits.c.category_id == spent.c.category_id),
+                full=True,
+            ))
+            .subquery("category_months")
+        )
+
+        rows = self.db.execute(
+            select(
+                months.c.month,
+                year_plans.c.plan_id,
+                func.coalesce(incomes.c.income, 0).label("income"),
+                category_months.c.category_id,
+                Category.name.label("category_name"),
+                category_months.c.limit,
+                category_months.c.spent,
+            )
+            .select_from(months)
+            .outerjoin(year_plans, year_plans.c.month == months.c.month)
+            .outerjoin(incomes, incomes.c.month == months.c.month)
+            .outerjoin(category_months, category_months.c.month == months.c.month)
+            .outerjoin(Category, Category.id == category_months.c.category_id)
+            .order_by(months.c.month, Category.name)
+        ).all()
+
+        report_months: Dict[int, Dict[str, Any]] = {}
+        for row in rows:
+            month = report_months.setdefault(row.month, {
+                "month": row.month,
+                "plan_id": row.plan_id,
+                "income": row.income,
+                "planned": Decimal(0),
+                "spent": Decimal(0),
+                "categories": [],
+            })
+            if row.limit is None:
+                continue  # Month without limits or spending
+            month["planned"] += row.limit
+            month["spent"] += row.spent
+            month["categories"].append({
+                "category_id": row.category_id,
+                "category_name": row.category_name,
+                "limit": row.limit,
+                "spent": row.spent,
+                "variance": row.limit - row.spent,
+            })
+
+        for month in report_months.values():
+            month["variance"] = month["planned"] - month["spent"]
+
+        return {
+            "year": year,
+            "income": sum(month["income"] for month in report_months.values()),
+            "planned": sum(month["planned"] for month in report_months.values()),
+            "spent": sum(month["spent"] for month in report_months.values()),
+            "variance": sum(month["variance"] for month in report_months.values()),
+            "months": list(report_months.values()),
+        }
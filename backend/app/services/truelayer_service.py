@@ -1,45 +1,128 @@
-import os
-from pathlib import Path
+import asyncio
+import threading
+import time
+from urllib.parse import urlparse
 import requests
-from typing import Dict, Any, List, Optional
-from datetime import datetime, timedelta
+from requests.adapters import HTTPAdapter
+from typing import Dict, Any, List, Optional, Iterator, AsyncIterator, Tuple
+from datetime import date, datetime, timedelta
 from decimal import Decimal
-from dotenv import load_dotenv
+from functools import lru_cache
 
-# Get the absolute path to the .env file
-BASE_DIR = Path(__file__).resolve().parent.parent.parent
-env_path = BASE_DIR / ".env"
+from ..config import TrueLayerSettings, get_truelayer_settings
 
-# Load the environment variables with explicit path
-load_dotenv(dotenv_path=env_path)
 
-# Add debug prints to check what's being loaded
-print(f"TRUELAYER_CLIENT_ID: {os.getenv('TRUELAYER_CLIENT_ID')}")
-print(f"TRUELAYER_REDIRECT_URI: {os.getenv('TRUELAYER_REDIRECT_URI')}")
+class HostRateLimiter:
+    """Spaces out requests so that each host gets at most `rate` requests per second"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate
+        self._lock = threading.Lock()
+        self._next_slot: Dict[str, float] = {}
+
+    def wait(self, url: str) -> None:
+        """Block the calling thread until a request slot for the url's host is available"""
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
 
 
 class TrueLayerService:
-    # Use production endpoints
-    BASE_URL = "https://api.truelayer.com"
-    AUTH_URL = "https://auth.truelayer.com"
-
-    def __init__(self):
-        # Load values with fallbacks for debugging
-        self.client_id = os.getenv("TRUELAYER_CLIENT_ID")
-        self.client_secret = os.getenv("TRUELAYER_CLIENT_SECRET")
-        self.redirect_uri = (
-            os.getenv("TRUELAYER_REDIRECT_URI")
-            or "https://console.truelayer.com/redirect-page"
-        )
+    # Connection pooling / resilience settings for the shared HTTP session
+    REQUEST_TIMEOUT = (5, 30)  # (connect, read) seconds
+    POOL_CONNECTIONS = 4  # Number of hosts to keep pools for
+    POOL_MAXSIZE = 10  # Keep-alive connections per host
+    MAX_RETRIES = 3
+    RETRY_BACKOFF_FACTOR = 0.5
+    RETRY_STATUS_FORCELIST = (429, 500, 502, 503, 504)
+    RETRY_AFTER_MAX_SECONDS = 60
+
+    # Concurrency limits for multi-account fetches
+    MAX_CONCURRENT_REQUESTS = 5
+    MAX_REQUESTS_PER_SECOND = 10
+    # Cap on in-flight calls across all users of this instance (routes and auto-sync)
+    MAX_UPSTREAM_CALLS = 10
 
-        # Add debug prints in the constructor
-        print("Initialized TrueLayerService with:")
-        print(f"  - client_id: {self.client_id}")
-        print(f"  - redirect_uri: {self.redirect_uri}")
+    # History is downloaded in date windows so large initial syncs stream in bounded memory
+    HISTORY_WINDOW_DAYS = 90
+
+    def __init__(self, settings: Optional[TrueLayerSettings] = None):
+        settings = settings or get_truelayer_settings()
+        self.client_id = settings.client_id
+        self.client_secret = settings.client_secret
+        self.redirect_uri = settings.redirect_uri
+        self.api_url = settings.api_url
+        self.auth_url = settings.auth_url
+        self.initial_history_days = settings.initial_history_days
 
         if not self.client_id or not self.client_secret:
             print("WARNING: TrueLayer credentials not found!")
 
+        self.session = self._create_session()
+        self.rate_limiter = HostRateLimiter(self.MAX_REQUESTS_PER_SECOND)
+        self.upstream_slots = threading.BoundedSemaphore(self.MAX_UPSTREAM_CALLS)
+
+    def _create_session(self) -> requests.Session:
+        """Create a keep-alive session shared by all API calls (retries are done by `_request`)"""
+        adapter = HTTPAdapter(
+            pool_connections=self.POOL_CONNECTIONS,
+            pool_maxsize=self.POOL_MAXSIZE,
+        )
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def _request(self, method: str, url: str, rate_limited: bool = True, **kwargs) -> requests.Response:
+        """
+        Send a request within the upstream call limits, retrying transient failures.
+
+        Retries are done here rather than by the session's adapter so that every
+        attempt takes its own `upstream_slots` slot and (if `rate_limited`) rate
+        limiter token; a 429/5xx storm cannot push the real call rate above the caps.
+        Error statuses from RETRY_STATUS_FORCELIST and read failures are retried for
+        GET only, connect failures for every method. Waits honour Retry-After and
+        otherwise back off exponentially. The last response is returned as is.
+        """
+        kwargs.setdefault("timeout", self.REQUEST_TIMEOUT)
+        for attempt in range(self.MAX_RETRIES + 1):
+            last_attempt = attempt == self.MAX_RETRIES
+            try:
+                with self.upstream_slots:
+                    if rate_limited:
+                        self.rate_limiter.wait(url)
+                    response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as error:
+                # Once the request may have been sent, only GETs are safe to repeat
+                if last_attempt or (method != "GET" and not isinstance(error, requests.ConnectTimeout)):
+                    raise
+                time.sleep(self._retry_delay(attempt))
+                continue
+
+            if last_attempt or method != "GET" or response.status_code not in self.RETRY_STATUS_FORCELIST:
+                return response
+            response.close()
+            time.sleep(self._retry_delay(attempt, response.headers.get("Retry-After")))
+
+    def _retry_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Seconds to wait before retry number `attempt + 1`"""
+        if retry_after:
+            try:
+                return min(max(float(retry_after), 0), self.RETRY_AFTER_MAX_SECONDS)
+            except ValueError:
+                pass  # HTTP-date form; fall back to exponential backoff
+        return self.RETRY_BACKOFF_FACTOR * 2 ** attempt
+
+    def close(self) -> None:
+        """Release pooled connections"""
+        self.session.close()
+
     def generate_auth_link(self, state: str) -> str:
         """Generate authentication link for users to connect their bank account"""
         # Include all required scopes as in the working URL
@@ -65,14 +148,14 @@ class TrueLayerService:
         }
 
         params = "&".join([f"{k}={v}" for k, v in query_params.items()])
-        auth_url = f"{self.AUTH_URL}/?{params}"
+        auth_url = f"{self.auth_url}/?{params}"
         print(f"Generated auth URL: {auth_url}")
         return auth_url
 
     def exchange_code_for_token(self, code: str) -> Dict[str, Any]:
         """Exchange authorization code for access token"""
         # Use correct token endpoint for sandbox
-        url = f"{self.AUTH_URL}/connect/token"
+        url = f"{self.auth_url}/connect/token"
         payload = {
             "grant_type": "authorization_code",
             "client_id": self.client_id,
@@ -82,9 +165,8 @@ class TrueLayerService:
         }
 
         print(f"Sending token request to: {url}")
-        print(f"With payload: {payload}")
 
-        response = requests.post(url, data=payload)
+        response = self._request("POST", url, rate_limited=False, data=payload)
 
         # Check for errors and log them
         if response.status_code != 200:
@@ -96,7 +178,7 @@ class TrueLayerService:
 
     def refresh_access_token(self, refresh_token: str) -> Dict[str, Any]:
         """Refresh access token using refresh token"""
-        url = f"{self.AUTH_URL}/connect/token"
+        url = f"{self.auth_url}/connect/token"
         payload = {
             "grant_type": "refresh_token",
             "client_id": self.client_id,
@@ -104,16 +186,16 @@ class TrueLayerService:
             "refresh_token": refresh_token,
         }
 
-        response = requests.post(url, data=payload)
+        response = self._request("POST", url, rate_limited=False, data=payload)
         response.raise_for_status()
         return response.json()
 
     def get_accounts(self, access_token: str) -> List[Dict[str, Any]]:
         """Get user's bank accounts"""
-        url = f"{self.BASE_URL}/data/v1/accounts"
+        url = f"{self.api_url}/data/v1/accounts"
         headers = {"Authorization": f"Bearer {access_token}"}
 
-        response = requests.get(url, headers=headers)
+        response = self._request("GET", url, headers=headers)
         response.raise_for_status()
         return response.json().get("results", [])
 
@@ -125,7 +207,7 @@ class TrueLayerService:
         to_date: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
         """Get transactions for a specific account"""
-        url = f"{self.BASE_URL}/data/v1/accounts/{account_id}/transactions"
+        url = f"{self.api_url}/data/v1/accounts/{account_id}/transactions"
         headers = {"Authorization": f"Bearer {access_token}"}
         params = {}
 
@@ -134,10 +216,90 @@ class TrueLayerService:
         if to_date:
             params["to"] = to_date
 
-        response = requests.get(url, headers=headers, params=params)
+        response = self._request("GET", url, headers=headers, params=params)
         response.raise_for_status()
         return response.json().get("results", [])
 
+    def iter_account_transactions(
+        self,
+        access_token: str,
+        account_id: str,
+        from_date: Optional[str] = None,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Yield an account's transactions in batches, one date window at a time.
+
+        Windows run oldest to newest (HISTORY_WINDOW_DAYS each) starting at
+        `from_date`, or `initial_history_days` ago when there is none. The last
+        window is open-ended. Adjacent windows share their boundary day, so
+        callers should dedupe by transaction id.
+        """
+        today = date.today()
+        start = (
+            date.fromisoformat(from_date[:10]) if from_date
+            else today - timedelta(days=self.initial_history_days)
+        )
+        window = timedelta(days=self.HISTORY_WINDOW_DAYS)
+
+        while start + window < today:
+            end = start + window
+            yield self.get_account_transactions(
+                access_token, account_id, from_date=start.isoformat(), to_date=end.isoformat()
+            )
+            start = end
+
+        yield self.get_account_transactions(access_token, account_id, from_date=start.isoformat())
+
+    async def stream_transactions_for_accounts(
+        self,
+        access_token: str,
+        account_ids: List[str],
+        from_date: Optional[str] = None,
+        from_dates: Optional[Dict[str, Optional[str]]] = None,
+    ) -> AsyncIterator[Tuple[str, List[Dict[str, Any]]]]:
+        """
+        Stream (account_id, batch) pairs for several accounts as windows arrive.
+
+        Accounts are walked concurrently (at most MAX_CONCURRENT_REQUESTS at a time),
+        each in window order; at most MAX_CONCURRENT_REQUESTS batches are buffered,
+        so memory stays bounded however long the history is.
+        """
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_REQUESTS)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.MAX_CONCURRENT_REQUESTS)
+        done = object()
+
+        async def produce(account_id: str) -> None:
+            async with semaphore:
+                batches = self.iter_account_transactions(
+                    access_token, account_id,
+                    from_date=(from_dates or {}).get(account_id, from_date),
+                )
+                while True:
+                    batch = await asyncio.to_thread(next, batches, done)
+                    if batch is done:
+                        break
+                    await queue.put((account_id, batch))
+
+        producers = [asyncio.create_task(produce(account_id)) for account_id in account_ids]
+
+        async def finish() -> None:
+            try:
+                await asyncio.gather(*producers)
+            finally:
+                await queue.put(done)
+
+        finisher = asyncio.create_task(finish())
+        try:
+            while True:
+                item = await queue.get()
+                if item is done:
+                    break
+                yield item
+            await finisher  # Re-raise fetch errors
+        finally:
+            for task in [*producers, finisher]:
+                task.cancel()
+
     def format_transaction(
         self, tx_data: Dict[str, Any], user_id: int, connection_id: int
     ) -> Dict[str, Any]:
@@ -164,3 +326,15 @@ class TrueLayerService:
             "transaction_type": tx_data.get("transaction_type", ""),
             "bank_connection_id": connection_id,
         }
+
+
+@lru_cache
+def get_truelayer_service() -> TrueLayerService:
+    """
+    FastAPI dependency returning the shared TrueLayerService.
+
+    Built on first use rather than at import time; one instance is shared so that
+    connection pooling and upstream call limits apply process-wide. Tests can
+    swap it via `app.dependency_overrides[get_truelayer_service]`.
+    """
+    return TrueLayerService()
@@ -0,0 +1,60 @@
+from datetime import datetime
+from typing import Dict, Optional
+
+from backend.app.models.user import User
+from backend.app.utils.auth import get_current_user
+from fastapi import Depends, HTTPException, Request, Response
+
+
+def cache_headers(etag: str) -> Dict[str, str]:
+    # no-cache: the client may keep the response but must revalidate it every time
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag"""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag.removeprefix("W/") in (tag.removeprefix("W/") for tag in tags)
+
+
+class DataVersionETag:
+    """
+    Conditional GET dependency based on the user's data version.
+
+    `users.data_version` is bumped by database triggers on every write to the
+    user's transactions, categories, plans and limits, so a weak ETag built from
+    it changes whenever any of that data does. A matching If-None-Match is answered
+    with 304 before the endpoint runs, so its queries are skipped entirely.
+
+    Endpoints whose response also depends on the current date (e.g. "spent today")
+    use `daily=True`, which adds the date to the ETag.
+
+    Returns the ETag; endpoints returning their own Response must copy
+    `cache_headers(etag)` onto it.
+    """
+
+    def __init__(self, daily: bool = False):
+        self.daily = daily
+
+    def __call__(
+        self,
+        request: Request,
+        response: Response,
+        current_user: User = Depends(get_current_user),
+    ) -> str:
+        version = f"{current_user.id}.{current_user.data_version}"
+        if self.daily:
+            version += f".{datetime.utcnow().date().isoformat()}"
+        etag = f'W/"{version}"'
+
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            raise HTTPException(status_code=304, headers=cache_headers(etag))
+
+        response.headers.update(cache_headers(etag))
+        return etag
+
+
+data_version_etag = DataVersionETag()
+daily_data_version_etag = DataVersionETag(daily=True)
@@ -0,0 +1,100 @@
+"""
+Micro-benchmark of the GET /api/transactions serialization paths.
+
+Compares the previous path (a TransactionResponse model per row, re-validated
+against the PaginatedTransactions response_model and encoded with the stdlib JSON
+encoder, as FastAPI does) against `render_transaction_page` (one TypeAdapter pass
+over plain rows, encoded with orjson). No database is needed.
+
+Usage:
+    python -m backend.scripts.benchmark_transaction_serialization [rows] [repeat]
+"""
+import json
+import random
+import sys
+import timeit
+from datetime import date, timedelta
+from decimal import Decimal
+
+from pydantic import TypeAdapter
+
+from backend.app.routes.transactions import render_transaction_page
+from backend.app.schemas.schemas import (
+    CategoryInTransaction,
+    PaginatedTransactions,
+    TransactionResponse,
+)
+
+
+def _rows(count: int):
+    rng = random.Random(42)
+    start = date(2025, 1, 1)
+    return [
+        (
+            i + 1,
+            start + timedelta(days=i % 365),
+            f"CARD PAYMENT Biedronka {i}",
+            Decimal(rng.randint(-2500000, -1)) / 100,
+            1,
+            rng.choice([None, 1, 2, 3]),
+            "Groceries",
+        )
+        for i in range(count)
+    ]
+
+
+def _previous_path(rows, page_size: int) -> bytes:
+    transactions = [
+        TransactionResponse(
+            id=transaction_id,
+            operation_date=operation_date,
+            description=description,
+            category=(
+                CategoryInTransaction(id=category_id, name=category_name, user_id=user_id)
+                if category_id else None
+            ),
+            amount=amount,
+            user_id=user_id,
+        )
+        for transaction_id, operation_date, description, amount, user_id, category_id, category_name in rows
+    ]
+    content = {
+        "transactions": transactions,
+        "page": 1,
+        "page_size": page_size,
+        "total_transactions": len(rows),
+        "total_pages": 1,
+    }
+    adapter = TypeAdapter(PaginatedTransactions)
+    validated = adapter.validate_python(content)
+    return json.dumps(
+        adapter.dump_python(validated, mode="json"),
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def _fast_path(rows, page_size: int) -> bytes:
+    return render_transaction_page(rows, 1, page_size, len(rows), 1).body
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    rows = _rows(count)
+
+    previous = json.loads(_previous_path(rows, count))
+    fast = json.loads(_fast_path(rows, count))
+    assert previous == fast, "serialization paths disagree"
+
+    results = {}
+    for name, path in (("previous", _previous_path), ("fast", _fast_path)):
+        seconds = min(timeit.repeat(lambda: path(rows, count), number=repeat, repeat=5)) / repeat
+        results[name] = seconds
+        print(f"{name:>8}: {seconds * 1000:.2f} ms per {count}-row page")
+    print(f" speedup: {results['previous'] / results['fast']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Regression check for N+1 queries in the category listing endpoints.
+
+Seeds two users inside a transaction that is rolled back at the end: one with a
+single category and one with many, every category linked to two main categories.
+Each endpoint is then called for both users while counting the SQL statements it
+runs; the counts must be the same, i.e. not grow with the number of categories.
+
+Needs a migrated database (DATABASE_URL); nothing is left behind.
+
+Usage:
+    python -m backend.scripts.check_category_query_counts [categories]
+"""
+import sys
+from typing import Dict, List
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from backend.app.database.database import engine, get_db
+from backend.app.main import app
+from backend.app.models import Category, User
+from backend.app.models.transaction import MainCategory
+from backend.app.utils.auth import get_current_user
+
+ENDPOINTS = [
+    "/api/transactions/categories",
+    "/api/transactions/categories?only_names=true",
+    "/api/transactions/main-categories/{main_category_id}",
+    "/api/transactions/main-categories/{main_category_id}/categories",
+]
+
+
+def _seed_user(db: Session, email: str, category_count: int) -> Dict[str, int]:
+    user = User(email=email, hashed_password="-")
+    main_categories = [MainCategory(name=f"Main {i}", user=user) for i in range(2)]
+    for i in range(category_count):
+        db.add(Category(name=f"Category {i}", user=user, main_categories=main_categories))
+    db.add(user)
+    db.flush()
+    return {"user_id": user.id, "main_category_id": main_categories[0].id}
+
+
+def _count_queries(client: TestClient, url: str) -> int:
+    statements: List[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        response = client.get(url)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    response.raise_for_status()
+    return len(statements)
+
+
+def main() -> None:
+    category_count = int(sys.argv[1]) if len(sys.argv) > 1 else 150
+
+    connection = engine.connect()
+    outer = connection.begin()
+    db = Session(bind=connection, join_transaction_mode="create_savepoint")
+    current = {}
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[get_current_user] = lambda: db.get(User, current["user_id"])
+
+    try:
+        users = {
+            1: _seed_user(db, "query-count-small@example.com", 1),
+            category_count: _seed_user(db, "query-count-large@example.com", category_count),
+        }
+        client = TestClient(app)
+
+        failures = 0
+        for endpoint in ENDPOINTS:
+            counts = {}
+            for size, seeded in users.items():
+                current["user_id"] = seeded["user_id"]
+                db.expunge_all()  # Start every call with an empty identity map
+                counts[size] = _count_queries(client, endpoint.format(**seeded))
+            constant = len(set(counts.values())) == 1
+            failures += not constant
+            print(
+                f"{'ok' if constant else 'FAIL':>4}  {endpoint}: "
+                + ", ".join(f"{queries} queries for {size} categories" for size, queries in counts.items())
+            )
+    finally:
+        app.dependency_overrides.clear()
+        db.close()
+        outer.rollback()
+        connection.close()
+
+    if failures:
+        sys.exit(f"{failures} endpoint(s) run a number of queries that grows with the categories")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Local fake of the TrueLayer auth and data APIs.
+
+Serves deterministic accounts and transactions with configurable latency so the
+bank sync can be exercised (and timed) without a real bank connection.
+
+Usage:
+    uvicorn backend.scripts.fake_truelayer:app --port 9000
+
+    TRUELAYER_API_URL=http://localhost:9000
+    TRUELAYER_AUTH_URL=http://localhost:9000
+
+Environment:
+    FAKE_TRUELAYER_ACCOUNTS: number of accounts returned (default 3)
+    FAKE_TRUELAYER_TRANSACTIONS: transactions per account (default 50)
+    FAKE_TRUELAYER_LATENCY: artificial delay per data request in seconds (default 0.2)
+"""
+import asyncio
+import os
+import random
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import FastAPI, Form, HTTPException, Query
+
+ACCOUNTS = int(os.getenv("FAKE_TRUELAYER_ACCOUNTS", "3"))
+TRANSACTIONS_PER_ACCOUNT = int(os.getenv("FAKE_TRUELAYER_TRANSACTIONS", "50"))
+LATENCY = float(os.getenv("FAKE_TRUELAYER_LATENCY", "0.2"))
+
+MERCHANTS = ["Biedronka", "Lidl", "Uber", "Netflix", "Orlen", "Zabka", "Allegro", ""]
+
+app = FastAPI(title="Fake TrueLayer")
+
+
+def _account_id(index: int) -> str:
+    return f"fake-account-{index}"
+
+
+def _transactions(account_id: str):
+    rng = random.Random(account_id)
+    start = datetime(2025, 1, 1)
+    for i in range(TRANSACTIONS_PER_ACCOUNT):
+        merchant = rng.choice(MERCHANTS)
+        amount = round(rng.uniform(-250, -1), 2) if rng.random() < 0.9 else round(rng.uniform(100, 5000), 2)
+        yield {
+            "transaction_id": f"{account_id}-tx-{i}",
+            "timestamp": (start + timedelta(hours=7 * i)).isoformat() + "Z",
+            "description": f"CARD PAYMENT {merchant or 'TRANSFER'} {i}",
+            "amount": amount,
+            "currency": "PLN",
+            "transaction_type": "DEBIT" if amount < 0 else "CREDIT",
+            "merchant_name": merchant,
+        }
+
+
+@app.post("/connect/token")
+async def token(grant_type: str = Form(...), code: Optional[str] = Form(None), refresh_token: Optional[str] = Form(None)):
+    if grant_type not in ("authorization_code", "refresh_token"):
+        raise HTTPException(status_code=400, detail="unsupported_grant_type")
+    return {
+        "access_token": "fake-access-token",
+        "refresh_token": "fake-refresh-token",
+        "expires_in": 3600,
+        "token_type": "Bearer",
+    }
+
+
+@app.get("/data/v1/accounts")
+async def accounts():
+    await asyncio.sleep(LATENCY)
+    return {
+        "results": [
+            {
+                "account_id": _account_id(i),
+                "display_name": f"Fake account {i}",
+                "provider": {"provider_id": "fake-bank", "display_name": "Fake Bank"},
+            }
+            for i in range(ACCOUNTS)
+        ]
+    }
+
+
+@app.get("/data/v1/accounts/{account_id}/transactions")
+async def account_transactions(
+    account_id: str,
+    from_date: Optional[str] = Query(None, alias="from"),
+    to_date: Optional[str] = Query(None, alias="to"),
+):
+    await asyncio.sleep(LATENCY)
+    results = [
+        tx for tx in _transactions(account_id)
+        if (not from_date or tx["timestamp"][:10] >= from_date[:10])
+        and (not to_date or tx["timestamp"][:10] <= to_date[:10])
+    ]
+    return {"results": results}
@@ -0,0 +1,344 @@
+"""
+Seed a database with synthetic, production-sized budget data.
+
+Creates users with categories, main categories, monthly plans with limits and
+income, categorization rules, filter rules and transactions. Merchants follow a
+long-tailed popularity distribution and each has its own log-normal amount
+distribution. All rows are loaded with COPY, so tens of millions of transactions
+load in minutes; the same --seed always produces the same dataset.
+
+The schema must already exist (alembic upgrade head). Seeded users get emails
+`<email-prefix>-<n>@example.com` and the password given by --password.
+
+Usage:
+    DATABASE_URL=postgresql://... python -m backend.scripts.seed_synthetic_data \\
+        --users 100 --transactions 10000000
+
+For the largest datasets, loading is dominated by maintaining the GIN search
+indexes on transactions; dropping them before and recreating them after the load
+is considerably faster.
+"""
+import argparse
+import time
+from datetime import date, datetime, timedelta
+from typing import Iterable, Iterator, List, Sequence
+
+import numpy as np
+
+from backend.app.database.database import engine
+from backend.app.utils.auth import get_password_hash
+
+# (merchant, category, median expense amount, amount spread)
+MERCHANTS = [
+    ("Biedronka", "Groceries", 45, 0.8),
+    ("Lidl", "Groceries", 55, 0.8),
+    ("Zabka", "Groceries", 18, 0.6),
+    ("Carrefour", "Groceries", 90, 0.7),
+    ("Orlen", "Fuel", 220, 0.4),
+    ("Shell", "Fuel", 200, 0.4),
+    ("Uber", "Transport", 28, 0.6),
+    ("Bolt", "Transport", 24, 0.6),
+    ("PKP Intercity", "Transport", 90, 0.5),
+    ("McDonald's", "Restaurants", 38, 0.5),
+    ("Starbucks", "Restaurants", 22, 0.4),
+    ("Pyszne.pl", "Restaurants", 65, 0.5),
+    ("Netflix", "Subscriptions", 43, 0.1),
+    ("Spotify", "Subscriptions", 24, 0.1),
+    ("Allegro", "Shopping", 120, 1.0),
+    ("Amazon", "Shopping", 150, 1.0),
+    ("Zalando", "Clothing", 210, 0.7),
+    ("H&M", "Clothing", 130, 0.6),
+    ("Rossmann", "Health", 50, 0.7),
+    ("Apteka Gemini", "Health", 60, 0.8),
+    ("PGE", "Utilities", 180, 0.3),
+    ("Orange", "Utilities", 70, 0.2),
+    ("Multikino", "Entertainment", 55, 0.4),
+    ("IKEA", "Home", 300, 1.0),
+]
+CATEGORY_NAMES = sorted({category for _, category, _, _ in MERCHANTS}) + ["Rent", "Gifts", "Travel", "Education"]
+MAIN_CATEGORY_NAMES = ["Essentials", "Lifestyle", "Home & Bills", "Mobility", "Savings"]
+CITIES = ["Warszawa", "Krakow", "Gdansk", "Wroclaw", "Poznan", "Lodz"]
+INCOME_SHARE = 0.05
+UNCATEGORIZED_SHARE = 0.15
+CHUNK_SIZE = 200_000
+
+
+class CopyStream:
+    """File-like object that feeds COPY FROM STDIN from an iterator of text chunks"""
+
+    def __init__(self, chunks: Iterable[str]):
+        self.chunks = iter(chunks)
+        self.buffer = b""
+        self.position = 0
+
+    def read(self, size: int = -1) -> bytes:
+        if self.position >= len(self.buffer):
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                return b""
+            self.buffer, self.position = chunk.encode("utf-8"), 0
+        end = len(self.buffer) if size < 0 else self.position + size
+        data = self.buffer[self.position:end]
+        self.position = end
+        return data
+
+
+def _copy(cursor, table: str, columns: Sequence[str], chunks: Iterable[str]) -> None:
+    cursor.copy_expert(
+        f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT text, NULL '\\N')",
+        CopyStream(chunks),
+        size=1 << 20,
+    )
+
+
+def _rows(rows: Iterable[Sequence]) -> Iterator[str]:
+    """Render rows as COPY text lines, in chunks"""
+    lines: List[str] = []
+    for row in rows:
+        lines.append("\t".join("\\N" if value is None else str(value) for value in row))
+        if len(lines) >= 10_000:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+def _reserve_ids(cursor, table: str, count: int) -> np.ndarray:
+    """Allocate `count` ids from the table's serial sequence so rows can be copied with known ids"""
+    cursor.execute(
+        "SELECT nextval(pg_get_serial_sequence(%s, 'id')) FROM generate_series(1, %s)",
+        (table, count),
+    )
+    return np.array([row[0] for row in cursor.fetchall()], dtype=np.int64)
+
+
+def _month_starts(start: date, months: int) -> List[date]:
+    result = []
+    year, month = start.year, start.month
+    for _ in range(months):
+        result.append(date(year, month, 1))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return result
+
+
+def _transaction_chunks(
+    rng: np.random.Generator,
+    total: int,
+    user_ids: np.ndarray,
+    category_ids: np.ndarray,
+    start: date,
+    days: int,
+) -> Iterator[str]:
+    """
+    Generate transactions in chunks of CHUNK_SIZE rows.
+
+    Users get uneven activity (gamma-distributed weights), merchants follow a Zipf-like
+    popularity curve, expense amounts are log-normal around each merchant's median
+    and about INCOME_SHARE of rows are incoming transfers.
+    """
+    user_weights = rng.gamma(2.0, 1.0, len(user_ids))
+    user_weights /= user_weights.sum()
+    merchant_weights = 1.0 / np.arange(1, len(MERCHANTS) + 1) ** 0.9
+    merchant_weights /= merchant_weights.sum()
+    medians = np.array([median for _, _, median, _ in MERCHANTS], dtype=float)
+    spreads = np.array([spread for _, _, _, spread in MERCHANTS], dtype=float)
+    merchant_categories = np.array([CATEGORY_NAMES.index(category) for _, category, _, _ in MERCHANTS])
+    descriptions = [f"CARD PAYMENT {merchant}" for merchant, _, _, _ in MERCHANTS]
+    day_names = [(start + timedelta(days=day)).isoformat() for day in range(days)]
+
+    remaining = total
+    while remaining > 0:
+        size = min(CHUNK_SIZE, remaining)
+        remaining -= size
+
+        users = rng.choice(len(user_ids), size=size, p=user_weights)
+        merchants = rng.choice(len(MERCHANTS), size=size, p=merchant_weights)
+        income = rng.random(size) < INCOME_SHARE
+        uncategorized = rng.random(size) < UNCATEGORIZED_SHARE
+        amounts = np.round(np.exp(np.log(medians[merchants]) + spreads[merchants] * rng.standard_normal(size)), 2)
+        amounts = np.where(income, np.round(rng.lognormal(np.log(3000), 0.6, size), 2), -amounts)
+        day_offsets = rng.integers(0, days, size)
+        cities = rng.integers(0, len(CITIES), size)
+        categories = category_ids[users, merchant_categories[merchants]]
+
+        lines = []
+        for i in range(size):
+            operation_date = day_names[day_offsets[i]]
+            if income[i]:
+                lines.append(
+                    f"{user_ids[users[i]]}\t{operation_date}\tTRANSFER SALARY\t{amounts[i]:.2f}\t"
+                    "\\N\t\\N\tMain account\tCREDIT"
+                )
+                continue
+            merchant = MERCHANTS[merchants[i]][0]
+            category = "\\N" if uncategorized[i] or categories[i] == 0 else categories[i]
+            lines.append(
+                f"{user_ids[users[i]]}\t{operation_date}\t{descriptions[merchants[i]]} {CITIES[cities[i]]}\t"
+                f"{amounts[i]:.2f}\t{category}\t{merchant}\tMain account\tDEBIT"
+            )
+        yield "\n".join(lines) + "\n"
+
+
+def seed(args: argparse.Namespace) -> None:
+    rng = np.random.default_rng(args.seed)
+    start = date.fromisoformat(args.start_date)
+    month_starts = _month_starts(start, args.months)
+    days = (month_starts[-1].replace(day=28) + timedelta(days=4)).replace(day=1).toordinal() - start.toordinal()
+    category_names = CATEGORY_NAMES[:args.categories]
+    category_names += [f"Category {i}" for i in range(len(category_names) + 1, args.categories + 1)]
+    password_hash = get_password_hash(args.password)
+    # created_at/updated_at only have Python-side defaults, so COPY has to fill them in
+    now = datetime.utcnow().isoformat(sep=" ")
+
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        timings = {}
+
+        def load(stage: str, table: str, columns: Sequence[str], chunks: Iterable[str]) -> None:
+            started = time.perf_counter()
+            _copy(cursor, table, columns, chunks)
+            timings[stage] = time.perf_counter() - started
+            print(f"{stage}: {timings[stage]:.1f}s")
+
+        user_ids = _reserve_ids(cursor, "users", args.users)
+        load("users", "users", ["id", "email", "hashed_password"], _rows(
+            (user_id, f"{args.email_prefix}-{n}@example.com", password_hash)
+            for n, user_id in enumerate(user_ids, start=1)
+        ))
+
+        # category_ids[u, c]: id of category c of user u (0 where the user has no such category)
+        category_ids = np.zeros((args.users, len(CATEGORY_NAMES)), dtype=np.int64)
+        all_category_ids = _reserve_ids(cursor, "categories", args.users * len(category_names)).reshape(
+            args.users, len(category_names)
+        )
+        shared = min(len(CATEGORY_NAMES), len(category_names))
+        category_ids[:, :shared] = all_category_ids[:, :shared]
+        load("categories", "categories", ["id", "name", "user_id"], _rows(
+            (all_category_ids[u, c], name, user_id)
+            for u, user_id in enumerate(user_ids)
+            for c, name in enumerate(category_names)
+        ))
+
+        main_category_names = MAIN_CATEGORY_NAMES[:args.main_categories]
+        main_category_names += [f"Group {i}" for i in range(len(main_category_names) + 1, args.main_categories + 1)]
+        if main_category_names:
+            main_category_ids = _reserve_ids(
+                cursor, "main_categories", args.users * len(main_category_names)
+            ).reshape(args.users, len(main_category_names))
+            load("main categories", "main_categories", ["id", "name", "user_id"], _rows(
+                (main_category_ids[u, m], name, user_id)
+                for u, user_id in enumerate(user_ids)
+                for m, name in enumerate(main_category_names)
+            ))
+            # Every category in one main category, every fifth also in the next one
+            load("category links", "category_main_category", ["category_id", "main_category_id"], _rows(
+                (all_category_ids[u, c], main_category_ids[u, (c + extra) % len(main_category_names)])
+                for u in range(args.users)
+                for c in range(len(category_names))
+                for extra in ((0, 1) if c % 5 == 0 and len(main_category_names) > 1 else (0,))
+            ))
+
+        if month_starts:
+            plan_ids = _reserve_ids(cursor, "plans", args.users * len(month_starts)).reshape(
+                args.users, len(month_starts)
+            )
+            load("plans", "plans", ["id", "month", "year", "user_id"], _rows(
+                (plan_ids[u, p], month_start.month, month_start.year, user_id)
+                for u, user_id in enumerate(user_ids)
+                for p, month_start in enumerate(month_starts)
+            ))
+            base_limits = np.round(rng.lognormal(np.log(400), 0.7, (args.users, len(category_names))), -1)
+            load("category limits", "category_limits", ["category_id", "user_id", "plan_id", '"limit"'], _rows(
+                (
+                    all_category_ids[u, c],
+                    user_id,
+                    plan_ids[u, p],
+                    f"{base_limits[u, c] * rng.uniform(0.9, 1.1):.2f}",
+                )
+                for u, user_id in enumerate(user_ids)
+                for p in range(len(month_starts))
+                for c in range(len(category_names))
+            ))
+            salaries = np.round(rng.lognormal(np.log(7000), 0.4, args.users), -2)
+            load(
+                "plan incomes",
+                "plan_incomes",
+                ["plan_id", "user_id", "amount", "description", "created_at", "updated_at"],
+                _rows(
+                    (plan_ids[u, p], user_id, f"{salaries[u]:.2f}", "Salary", now, now)
+                    for u, user_id in enumerate(user_ids)
+                    for p in range(len(month_starts))
+                ),
+            )
+
+        merchant_rules = [
+            (merchant, category) for merchant, category, _, _ in MERCHANTS if category in category_names
+        ]
+        load("categorization rules", "categorization_rules", ["user_id", "merchant_name", "category_id"], _rows(
+            (user_id, merchant, all_category_ids[u, category_names.index(category)])
+            for u, user_id in enumerate(user_ids)
+            for merchant, category in merchant_rules[:args.rules]
+        ))
+        # Description-only rules: a rule's criteria are OR-ed, so adding an amount
+        # threshold would make it match most transactions
+        load(
+            "filter rules",
+            "transaction_filter_rules",
+            ["user_id", "description_pattern", "is_active", "created_at", "updated_at"],
+            _rows(
+                (user_id, f"INTERNAL TRANSFER {r}", "true", now, now)
+                for user_id in user_ids
+                for r in range(args.filter_rules)
+            ),
+        )
+
+        load(
+            "transactions",
+            "transactions",
+            [
+                "user_id", "operation_date", "description", "amount",
+                "category_id", "merchant_name", "account_name", "transaction_type",
+            ],
+            _transaction_chunks(rng, args.transactions, user_ids, category_ids, start, days),
+        )
+
+        started = time.perf_counter()
+        cursor.execute("ANALYZE")
+        connection.commit()
+        print(f"analyze + commit: {time.perf_counter() - started:.1f}s")
+        print(f"total: {sum(timings.values()) + time.perf_counter() - started:.1f}s")
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Seed the database with synthetic budget data")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--categories", type=int, default=len(CATEGORY_NAMES), help="Categories per user")
+    parser.add_argument(
+        "--main-categories", type=int, default=len(MAIN_CATEGORY_NAMES), help="Main categories per user"
+    )
+    parser.add_argument("--months", type=int, default=24, help="Monthly plans per user, with limits and income")
+    parser.add_argument("--rules", type=int, default=len(MERCHANTS), help="Merchant categorization rules per user")
+    parser.add_argument("--filter-rules", type=int, default=2, help="Transaction filter rules per user")
+    parser.add_argument(
+        "--transactions", type=int, default=1_000_000, help="Transactions in total, spread over all users"
+    )
+    parser.add_argument(
+        "--start-date", default="2024-01-01", help="First day of the seeded period (plans and transactions)"
+    )
+    parser.add_argument("--email-prefix", default="synthetic")
+    parser.add_argument("--password", default="password")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    if args.users < 1 or args.months < 1:
+        parser.error("--users and --months must be at least 1")
+    seed(args)
+
+
+if __name__ == "__main__":
+    main()